@@ -1,27 +1,242 @@
-from flask import Flask, request, jsonify
-from tensorflow.keras.models import load_model
+import functools
+import os
+import sys
+import threading
+from concurrent.futures import TimeoutError as PredictTimeout
+from flask import Flask, Response, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 import numpy as np
 
-leaf_deases_model = load_model('/home/shukur/Documents/Python Code/Tree Deases/Leaf_Deases(95,88).h5')
+# Make the shared modules in the project root importable when run as `python "API/Make API.py"`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from model_registry import DEFAULT_MODEL_PATH, get_model_entry, is_loaded, registry_stats, warm_up
+from batching import get_batcher
+from inference_backends import backend_for
+from prediction_cache import prediction_cache, model_identity
+from disease_data import label_name
+from preprocessing import preprocess_batch, TARGET_SIZE, VERSION as PREPROCESSING_VERSION
+from prediction_log import get_prediction_log
+import auth
+import metrics
 
-label_name = ['Apple scab','Apple Black rot', 'Apple Cedar apple rust', 'Apple healthy', 'Cherry Powdery mildew',
-'Cherry healthy','Corn Cercospora leaf spot Gray leaf spot', 'Corn Common rust', 'Corn Northern Leaf Blight','Corn healthy', 
-'Grape Black rot', 'Grape Esca', 'Grape Leaf blight', 'Grape healthy','Peach Bacterial spot','Peach healthy', 'Pepper bell Bacterial spot', 
-'Pepper bell healthy', 'Potato Early blight', 'Potato Late blight', 'Potato healthy', 'Strawberry Leaf scorch', 'Strawberry healthy',
-'Tomato Bacterial spot', 'Tomato Early blight', 'Tomato Late blight', 'Tomato Leaf Mold', 'Tomato Septoria leaf spot',
-'Tomato Spider mites', 'Tomato Target Spot', 'Tomato Yellow Leaf Curl Virus', 'Tomato mosaic virus', 'Tomato healthy']
+# Same model as the Streamlit app (LEAF_MODEL_PATH / LEAF_MODEL_BACKEND), resolved from the project root
+MODEL_PATH = os.path.join(ROOT, DEFAULT_MODEL_PATH)
+# Backpressure: requests beyond this many in flight per worker get a 503 instead of queueing up.
+# gunicorn.conf.py sets it to half the worker's threads; 64 is for the threaded development server.
+MAX_INFLIGHT = int(os.environ.get("LEAF_API_MAX_INFLIGHT", "64"))
+# Seconds a request may wait for its prediction before giving up with a 504
+REQUEST_TIMEOUT = float(os.environ.get("LEAF_API_REQUEST_TIMEOUT", "30"))
+# Largest request body, and most images in one /predict upload; bigger requests get a 413
+MAX_UPLOAD_MB = int(os.environ.get("LEAF_API_MAX_UPLOAD_MB", "32"))
+MAX_IMAGES = int(os.environ.get("LEAF_API_MAX_IMAGES", "64"))
+# Prediction routes need a token from /login (LEAF_API_AUTH=0 turns this off for local testing)
+REQUIRE_AUTH = os.environ.get("LEAF_API_AUTH", "1") != "0"
+# Shape the "/" route expects for 'img': one preprocessed RGB image, as produced by preprocessing.preprocess
+IMAGE_SHAPE = (TARGET_SIZE[1], TARGET_SIZE[0], 3)
+
+# Function to get the model, loading it on first use. gunicorn.conf.py loads it in the master
+# (fork-safe backends) or in the background in each worker, and /readyz reports when it's in.
+def leaf_deases_model():
+    return get_model_entry(MODEL_PATH)
+
+def batcher():
+    return get_batcher(leaf_deases_model())
+
+def start_loading_model():
+    warm_up(MODEL_PATH)
+
+metrics.register_collector("prediction_cache", prediction_cache.stats)
+metrics.register_collector("batcher", lambda: {k: v for k, v in batcher().stats().items() if not isinstance(v, dict)}
+                           if is_loaded(MODEL_PATH) else {})
+metrics.register_collector("model", lambda: registry_stats()[0] if is_loaded(MODEL_PATH) else {})
+metrics.register_collector("api_tokens", auth.tokens.stats)
+metrics.register_collector("prediction_log", lambda: get_prediction_log().stats())
 
 app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_MB * 1024 * 1024
+_inflight = threading.BoundedSemaphore(MAX_INFLIGHT)
+
+# Decorator to reject work up front when this worker is already at MAX_INFLIGHT requests
+def admission_control(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _inflight.acquire(blocking=False):
+            metrics.increment("api_rejected_overloaded")
+            return jsonify({"error": "Server is busy, please retry shortly"}), 503, {"Retry-After": "1"}
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _inflight.release()
+    return wrapper
+
+# Decorator to require "Authorization: Bearer <token>"; verified tokens are cached, so this costs microseconds
+def require_token(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not REQUIRE_AUTH:
+            return fn(*args, **kwargs)
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return jsonify({"error": "Missing bearer token, get one from /login"}), 401, {"WWW-Authenticate": "Bearer"}
+        try:
+            request.environ["leaf.user"] = auth.tokens.verify(token.strip())
+        except auth.AuthError as e:
+            metrics.increment("api_rejected_unauthorized")
+            return jsonify({"error": str(e)}), 401, {"WWW-Authenticate": 'Bearer error="invalid_token"'}
+        return fn(*args, **kwargs)
+    return wrapper
+
+# Function to queue predictions for the outbreak log; clients may pass their location as ?lat=..&lon=..
+def log_predictions(class_ids, confidences):
+    lat, lon = request.args.get("lat", type=float), request.args.get("lon", type=float)
+    prediction_log = get_prediction_log()
+    for class_id, confidence in zip(class_ids, confidences):
+        prediction_log.log(class_id, confidence, user=request.environ.get("leaf.user"), lat=lat, lon=lon,
+                           source="api")
+
+class InvalidImage(ValueError):
+    pass
+
+# Function to turn the JSON 'img' field into an image array, raising InvalidImage before it reaches the batcher
+def parse_image(data):
+    if not isinstance(data, dict) or 'img' not in data:
+        raise InvalidImage("Request body must be JSON with an 'img' field")
+    try:
+        img = np.asarray(data['img'])
+    except ValueError:
+        raise InvalidImage("'img' must be a nested list of pixel values")
+    if img.shape != IMAGE_SHAPE:
+        raise InvalidImage(f"'img' must have shape {list(IMAGE_SHAPE)}, got {list(img.shape)}")
+    if img.dtype.kind not in "iuf":
+        raise InvalidImage(f"'img' must contain numbers, got {img.dtype}")
+    return img
+
+@app.errorhandler(InvalidImage)
+def invalid_image(e):
+    metrics.increment("api_rejected_invalid_image")
+    return jsonify({"error": str(e)}), 400
+
+@app.errorhandler(RequestEntityTooLarge)
+def too_large(e):
+    metrics.increment("api_rejected_too_large")
+    return jsonify({"error": f"Request body is larger than {MAX_UPLOAD_MB} MB"}), 413
+
+@app.errorhandler(PredictTimeout)
+def predict_timeout(e):
+    metrics.increment("api_predict_timeouts")
+    return jsonify({"error": "Prediction timed out"}), 504
+
+# Liveness: the process is up and serving requests
+@app.route("/healthz", methods=['GET'])
+def healthz():
+    return jsonify({"status": "ok", "pid": os.getpid()})
+
+# Readiness: the model is loaded and the worker has spare capacity
+@app.route("/readyz", methods=['GET'])
+def readyz():
+    ready = is_loaded(MODEL_PATH)
+    body = {"model_loaded": ready, "backend": backend_for(MODEL_PATH), "queue_depth": batcher().queue_depth() if ready else 0,
+            "max_inflight": MAX_INFLIGHT, "pid": os.getpid()}
+    return jsonify(body), 200 if ready else 503
+
+# Exchange a username and password (same users as the Streamlit app) for an expiring API token
+@app.route("/login", methods=['POST'])
+@admission_control
+@metrics.timed("api.login")
+def api_login():
+    data = request.get_json(silent=True) or {}
+    username, password = data.get("username"), data.get("password")
+    if not username or not password or not auth.authenticate(username, password):
+        return jsonify({"error": "Invalid credentials"}), 401
+    return jsonify({"token": auth.tokens.issue(username), "token_type": "Bearer",
+                    "expires_in": auth.tokens.ttl})
 
 @app.route("/",methods=['POST'])
+@require_token
+@admission_control
+@metrics.timed("api.just", profile=True)
 def just():
-    data = request.json
-    img = np.array(data['img'])
+    # The raw request body is hashed so repeated uploads skip JSON parsing and predict
+    def run_prediction():
+        with metrics.stage_timer("api.json_decode"):
+            img = parse_image(request.get_json(silent=True))
+        # Single images are merged with other concurrent requests by the micro-batcher
+        with metrics.stage_timer("model.predict"):
+            return batcher().predict(img, timeout=REQUEST_TIMEOUT)
+
+    pridict_image = np.expand_dims(
+        prediction_cache.get_or_compute(request.get_data(), model_identity(MODEL_PATH, PREPROCESSING_VERSION), run_prediction), axis=0)
 
-    pridict_image = leaf_deases_model.predict(img.reshape((1,) + img.shape ))
+    log_predictions([np.argmax(pridict_image)], [pridict_image[0][np.argmax(pridict_image)]])
 
     return jsonify({"Label Name":label_name[np.argmax(pridict_image)],
-                  "Accuracy": pridict_image[0][np.argmax(pridict_image)]*100})
+                  "Accuracy": float(pridict_image[0][np.argmax(pridict_image)]*100)})
+
+# Binary batched endpoint: raw image bytes in the body, or a multipart upload of N files
+@app.route("/predict", methods=['POST'])
+@require_token
+@admission_control
+@metrics.timed("api.predict", profile=True)
+def predict_batch():
+    if request.files:
+        uploads = [(f.filename, f.read()) for f in request.files.getlist('images') or list(request.files.values())]
+    else:
+        uploads = [(None, request.get_data())]
+
+    if not uploads or not any(body for _, body in uploads):
+        return jsonify({"error": "No image data received"}), 400
+    if len(uploads) > MAX_IMAGES:
+        return jsonify({"error": f"At most {MAX_IMAGES} images per request"}), 413
+
+    # Decoded straight into one preallocated batch array (same preprocessing as main.py)
+    with metrics.stage_timer("image.preprocess_batch"):
+        images, failed = preprocess_batch([body for _, body in uploads])
+    if len(failed) == len(uploads):
+        return jsonify({"error": "Could not decode any of the images"}), 400
+    # Files that don't decode get an error entry; the rest are still predicted
+    failed = set(failed)
+    decoded = [i for i in range(len(uploads)) if i not in failed]
+
+    # Through the micro-batcher like single images, so uploads share batches and the 504 timeout
+    with metrics.stage_timer("model.predict_batch"):
+        predictions = batcher().predict_many(images[decoded], timeout=REQUEST_TIMEOUT)
+    best = np.argmax(predictions, axis=1)
+    log_predictions(best, predictions[np.arange(len(best)), best])
+
+    results = [{"File": name, "Error": "Could not decode image"} if i in failed else None
+               for i, (name, _) in enumerate(uploads)]
+    for row, (i, idx) in enumerate(zip(decoded, best)):
+        results[i] = {"File": uploads[i][0],
+                      "Label Name": label_name[idx],
+                      "Accuracy": float(predictions[row][idx] * 100)}
+    return jsonify({"predictions": results})
+
+# Outbreak monitoring: top diseases over the last `days`, optionally within `radius_km` of lat/lon and for one crop
+@app.route("/outbreaks", methods=['GET'])
+@require_token
+def outbreaks():
+    args = request.args
+    lat, lon = args.get("lat", type=float), args.get("lon", type=float)
+    results = get_prediction_log().top_diseases(lat, lon, args.get("radius_km", 50, type=float) if lat is not None else None,
+                                                days=args.get("days", 7, type=float), crop=args.get("crop"),
+                                                limit=args.get("limit", 10, type=int))
+    return jsonify({"top_diseases": results})
+
+# Queue depth and batch-size histograms for tuning LEAF_BATCH_MAX_SIZE / LEAF_BATCH_MAX_WAIT_MS
+@app.route("/batching", methods=['GET'])
+def batching_stats():
+    return jsonify(batcher().stats() if is_loaded(MODEL_PATH) else {})
+
+# Prometheus scrape endpoint
+@app.route("/metrics", methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/cache", methods=['GET'])
+def cache_stats():
+    return jsonify(prediction_cache.stats())
 
 if __name__ == "__main__":
+    start_loading_model()
     app.run(debug=True)
\ No newline at end of file
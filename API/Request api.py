@@ -1,11 +1,35 @@
+import os
+import sys
 import requests
-import numpy as np
-from keras.preprocessing.image import load_img,img_to_array
+
+# Use the same preprocessing module as the Streamlit app and the server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import preprocess
 
 url = 'http://127.0.0.1:5000/'
 
-img = img_to_array(load_img('DanLeaf2.jpg',target_size=(150,150,3)))
+# Log in once with an app account and send the token with every prediction request
+r = requests.post(url + 'login', json={'username': os.environ.get('LEAF_API_USER', 'farmer'),
+                                       'password': os.environ.get('LEAF_API_PASSWORD', '')})
+session = requests.Session()
+session.headers['Authorization'] = f"Bearer {r.json()['token']}"
+
+with open('DanLeaf2.jpg', 'rb') as f:
+    image_bytes = f.read()
+
+img = preprocess(image_bytes)
+
+r = session.post(url, json={'img':img.tolist()})
+
+print(f"\n\n{r.json()}\n\n")
+
+# Binary endpoint: send the JPEG bytes as-is, the server decodes and resizes
+r = session.post(url + 'predict', data=image_bytes, headers={'Content-Type': 'image/jpeg'})
+
+print(f"\n\n{r.json()}\n\n")
 
-r = requests.post(url, json={'img':img.tolist()})
+# Batched upload of several images in one request (one predict call on the server)
+files = [('images', (name, open(name, 'rb'), 'image/jpeg')) for name in ['DanLeaf2.jpg', 'DanLeaf2.jpg']]
+r = session.post(url + 'predict', files=files)
 
-print(f"\n\n{r.json()}\n\n")
\ No newline at end of file
+print(f"\n\n{r.json()}\n\n")
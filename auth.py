@@ -0,0 +1,165 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+
+# bcrypt work factor for new password hashes (each verify costs ~2^rounds work)
+BCRYPT_ROUNDS = int(os.environ.get("LEAF_BCRYPT_ROUNDS", "12"))
+# bcrypt runs on this many threads, so a burst of logins can't take every core away from predictions
+HASH_THREADS = int(os.environ.get("LEAF_AUTH_THREADS", "2"))
+# Signing key for API tokens. Set it in production: a random key means tokens die with the process
+# (gunicorn.conf.py generates one in the master, so all workers share it).
+TOKEN_SECRET = os.environ.get("LEAF_API_SECRET") or secrets.token_hex(32)
+TOKEN_TTL_SECONDS = int(os.environ.get("LEAF_API_TOKEN_TTL", "3600"))
+# Recently verified tokens, so repeat calls skip the signature check
+TOKEN_CACHE_SIZE = int(os.environ.get("LEAF_API_TOKEN_CACHE_SIZE", "4096"))
+# bcrypt only uses the first 72 bytes of a password (newer versions refuse longer input)
+MAX_PASSWORD_BYTES = 72
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class AuthError(Exception):
+    pass
+
+
+# Function to get the bcrypt thread pool, created on first use
+def _hash_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=HASH_THREADS, thread_name_prefix="leaf-auth")
+    return _pool
+
+
+# A forked child can't use the parent's pool threads, so it builds its own pool on first use
+def _reset_after_fork():
+    global _pool, _pool_lock
+    _pool, _pool_lock = None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _encode(password):
+    return password.encode("utf-8")[:MAX_PASSWORD_BYTES]
+
+
+def _hash(password, rounds):
+    import bcrypt
+
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode("ascii")
+
+
+def _check(password, hashed):
+    import bcrypt
+
+    try:
+        return bcrypt.checkpw(_encode(password), hashed.encode("ascii"))
+    except ValueError:  # Not a bcrypt hash
+        return False
+
+
+def is_hashed(value):
+    return isinstance(value, str) and value.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def hash_password(password, rounds=None):
+    return _hash_pool().submit(_hash, password, rounds or BCRYPT_ROUNDS).result()
+
+
+# Function to hash many passwords in parallel on the bcrypt pool (used by the users migration)
+def hash_passwords(passwords, rounds=None):
+    return list(_hash_pool().map(_hash, passwords, [rounds or BCRYPT_ROUNDS] * len(passwords)))
+
+
+def verify_password(password, hashed):
+    return _hash_pool().submit(_check, password, hashed).result()
+
+
+# Hash compared against when the username doesn't exist, so both cases take the same time
+_DUMMY_HASH = None
+
+
+# Function to check a username and password against users.db, returns the user row or None
+def authenticate(username, password):
+    global _DUMMY_HASH
+    row = db.fetch_one("SELECT id, username, password FROM users WHERE username = ?", (username,))
+    if row is None:
+        _DUMMY_HASH = _DUMMY_HASH or hash_password(secrets.token_hex(8))
+        verify_password(password, _DUMMY_HASH)
+        return None
+    return row if verify_password(password, row[2]) else None
+
+
+def create_user(username, password):
+    db.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hash_password(password)))
+
+
+class TokenIssuer:
+    """Signed, expiring API tokens (itsdangerous), with an LRU of tokens that already passed verification."""
+
+    def __init__(self, secret=TOKEN_SECRET, ttl=TOKEN_TTL_SECONDS, cache_size=TOKEN_CACHE_SIZE):
+        from itsdangerous import URLSafeTimedSerializer
+
+        self.serializer = URLSafeTimedSerializer(secret, salt="leaf-api-token")
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._verified = OrderedDict()
+        self._lock = threading.Lock()
+
+    def issue(self, username):
+        return self.serializer.dumps({"user": username})
+
+    # Function to return the username a token was issued to, raising AuthError if it's forged or expired
+    def verify(self, token):
+        now = time.time()
+        with self._lock:
+            cached = self._verified.get(token)
+            if cached is not None and cached[1] > now:
+                self._verified.move_to_end(token)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        from itsdangerous import BadSignature, SignatureExpired
+
+        try:
+            payload, issued_at = self.serializer.loads(token, max_age=self.ttl, return_timestamp=True)
+        except SignatureExpired:
+            raise AuthError("Token expired")
+        except BadSignature:
+            raise AuthError("Invalid token")
+
+        username = payload["user"]
+        with self._lock:
+            self._verified[token] = (username, issued_at.timestamp() + self.ttl)
+            self._verified.move_to_end(token)
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return username
+
+    def stats(self):
+        with self._lock:
+            return {"cached_tokens": len(self._verified), "hits": self.hits, "misses": self.misses,
+                    "ttl_seconds": self.ttl}
+
+
+tokens = TokenIssuer()
+
+
+# Migration: replace plaintext passwords in existing users rows with bcrypt hashes
+def hash_plaintext_passwords(conn):
+    rows = [(user_id, password) for user_id, password in conn.execute("SELECT id, password FROM users")
+            if not is_hashed(password)]
+    hashes = hash_passwords([password for _, password in rows])
+    conn.executemany("UPDATE users SET password = ? WHERE id = ?",
+                     [(hashed, user_id) for (user_id, _), hashed in zip(rows, hashes)])
@@ -0,0 +1,155 @@
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import Counter, defaultdict
+from concurrent.futures import Future, TimeoutError
+
+import numpy as np
+
+# Defaults for the shared inference queue (can be overridden with environment variables)
+MAX_BATCH_SIZE = int(os.environ.get("LEAF_BATCH_MAX_SIZE", "32"))
+MAX_WAIT_MS = float(os.environ.get("LEAF_BATCH_MAX_WAIT_MS", "5"))
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+# Every batcher in this process, so a forked child can restart their worker threads
+_live_batchers = weakref.WeakSet()
+
+
+class MicroBatcher:
+    """Collects single-image requests that arrive close together and runs them as one predict call."""
+
+    def __init__(self, predict_fn, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._stats_lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.queue_depths = Counter()
+        self.batches_run = 0
+        self.items_run = 0
+        self._start()
+        _live_batchers.add(self)
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, args=(self._queue,), name="leaf-micro-batcher", daemon=True)
+        self._worker.start()
+
+    # Function to queue one image (without a batch axis) and get a Future for its prediction row
+    def submit(self, image):
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def predict(self, image, timeout=None):
+        future = self.submit(image)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()  # Don't spend a batch slot on a caller that has given up
+            raise
+
+    # Function to predict several images (e.g. one multipart upload) within one overall timeout
+    def predict_many(self, images, timeout=None):
+        futures = [self.submit(image) for image in images]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            return np.stack([future.result(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+                             for future in futures])
+        except TimeoutError:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self.queue_depth(),
+                "batches_run": self.batches_run,
+                "items_run": self.items_run,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+                "queue_depth_histogram": dict(sorted(self.queue_depths.items())),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+    # Function to gather up to max_batch_size items, waiting at most max_wait after the first one
+    def _collect(self, pending):
+        items = [pending.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self, pending):
+        while True:
+            items = self._collect(pending)
+            with self._stats_lock:
+                self.queue_depths[pending.qsize()] += 1
+
+            # Skip callers that gave up before we got to them
+            items = [(image, future) for image, future in items if future.set_running_or_notify_cancel()]
+            if not items:
+                continue
+
+            # Images can only be stacked with others of the same shape, so a malformed one fails on its own
+            groups = defaultdict(list)
+            for image, future in items:
+                groups[np.shape(image)].append((image, future))
+            for group in groups.values():
+                self._predict_group(group)
+
+    def _predict_group(self, items):
+        try:
+            predictions = self.predict_fn(np.stack([image for image, _ in items]))
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+
+        for (_, future), row in zip(items, predictions):
+            future.set_result(row)
+
+        with self._stats_lock:
+            self.batch_sizes[len(items)] += 1
+            self.batches_run += 1
+            self.items_run += len(items)
+
+
+# Function to get the shared batcher for a model entry from model_registry
+def get_batcher(model_entry, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+    batcher = _batchers.get(model_entry.path)
+    if batcher is not None:
+        return batcher
+    with _batchers_lock:
+        batcher = _batchers.get(model_entry.path)
+        if batcher is None:
+            batcher = MicroBatcher(model_entry.predict, max_batch_size, max_wait_ms)
+            _batchers[model_entry.path] = batcher
+    return batcher
+
+
+def batcher_stats():
+    return {path: batcher.stats() for path, batcher in list(_batchers.items())}
+
+
+# Only the forking thread survives fork(), so a pre-forked server worker gives each batcher a new worker
+def _restart_after_fork():
+    for batcher in list(_live_batchers):
+        batcher._stats_lock = threading.Lock()
+        batcher._start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,70 @@
+"""End-to-end chat delivery latency with many simulated clients on one machine.
+
+    python benchmarks/chat_delivery.py --clients 200 --messages 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import db
+from broker import broker, topic_for
+from chat import get_new_messages, get_older_messages, send_message
+
+
+# One simulated session: waits on the broker, then reads only the new rows (like the chat fragment)
+def client(user, expected, ready, received):
+    topic = topic_for(user, "Everyone")
+    rows = get_older_messages(user, "Everyone")
+    last_id = max((row[0] for row in rows), default=0)
+    seq = broker.version(topic)[0]
+    ready.release()
+    count = 0
+    while count < expected:
+        seq, published_at = broker.wait(topic, seq, timeout=5)
+        if published_at is None:
+            break
+        new_rows = get_new_messages(user, "Everyone", last_id)
+        if new_rows:
+            broker.record_delivery(published_at)
+            last_id = new_rows[-1][0]
+            count += len(new_rows)
+    received.append(count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--interval-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        send_message("seed", "Everyone", "hello")
+
+        ready, received = threading.Semaphore(0), []
+        threads = [threading.Thread(target=client, args=(f"farmer{i}", args.messages, ready, received))
+                   for i in range(args.clients)]
+        for t in threads:
+            t.start()
+        for _ in threads:
+            ready.acquire()
+
+        start = time.perf_counter()
+        for i in range(args.messages):
+            send_message("publisher", "Everyone", f"message {i}")
+            time.sleep(args.interval_ms / 1000)
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        db.close_connections()
+
+    stats = broker.stats()
+    print(f"{args.clients} clients x {args.messages} messages in {elapsed:.2f}s, "
+          f"{sum(received)} rows delivered")
+    print(f"delivery latency p50 {stats['latency_p50_ms']:.1f} ms, "
+          f"p95 {stats['latency_p95_ms']:.1f} ms, max {stats['latency_max_ms']:.1f} ms")
@@ -0,0 +1,75 @@
+"""Queries/sec of the login and chat data layer under N concurrent simulated users.
+
+    python benchmarks/db_bench.py --users 16 --seconds 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import auth
+import db
+from login import check_login
+from chat import get_older_messages, get_registered_users, send_message
+
+
+# Function to create a throwaway database with some users and message history
+def seed(path, users, messages):
+    db.init_db(path)
+    conn = db.connect(path)
+    # Lowest bcrypt work factor, so the login check measures the data layer rather than hashing
+    password = auth.hash_password("secret", rounds=4)
+    with conn:
+        conn.executemany("INSERT INTO users (username, password) VALUES (?, ?)",
+                         [(f"farmer{i}", password) for i in range(users)])
+        conn.executemany("INSERT INTO messages (sender, recipient, message) VALUES (?, ?, ?)",
+                         [(f"farmer{random.randrange(users)}",
+                           None if random.random() < 0.3 else f"farmer{random.randrange(users)}",
+                           "hello") for _ in range(messages)])
+    conn.close()
+
+
+# One simulated user: mostly reads (login check, user list, a page of the public chat) with an occasional send
+def simulate_user(user, deadline, counts, write_ratio):
+    done = 0
+    while time.perf_counter() < deadline:
+        check_login(user, "secret")
+        get_registered_users(user)
+        get_older_messages(user, "Everyone")
+        done += 3
+        if random.random() < write_ratio:
+            send_message(user, "Everyone", "benchmark message")
+            done += 1
+    counts.append(done)
+
+
+def run(users, seconds, write_ratio):
+    counts = []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=simulate_user, args=(f"farmer{i}", deadline, counts, write_ratio))
+               for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        seed(db.DB_PATH, max(args.users, 2), args.messages)
+        for n in sorted({1, max(args.users // 4, 1), args.users}):
+            print(f"{n:>4} users: {run(n, args.seconds, args.write_ratio):>10.0f} queries/sec")
+        db.close_connections()
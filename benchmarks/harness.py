@@ -0,0 +1,62 @@
+"""Timing helpers shared by the benchmark suite."""
+import gc
+import resource
+import sys
+import time
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+# Function to get the peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+# Function to time fn() and summarise latency, throughput and peak memory
+def measure(name, fn, iterations=50, warmup=3, items_per_call=1, min_seconds=0.0):
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < iterations or time.perf_counter() - start < min_seconds:
+        t = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "name": name,
+        "iterations": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_per_sec": len(latencies) * items_per_call / total,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# Function to flag results whose p50 or throughput got worse than the baseline by more than `tolerance`
+# Baseline entries of the benchmarks that ran but are missing from `results` count as regressions too.
+def compare(results, baseline, tolerance=0.2, benchmarks=None):
+    previous = {r["name"]: r for r in baseline}
+    current = {r["name"] for r in results}
+    regressions = [f"{name}: missing from this run" for name, old in previous.items()
+                   if name not in current
+                   and (benchmarks is None or old.get("benchmark", name.split("/")[0]) in benchmarks)]
+    for result in results:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        if result["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{result['name']}: p50 {old['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms")
+        if result["throughput_per_sec"] < old["throughput_per_sec"] * (1 - tolerance):
+            regressions.append(f"{result['name']}: throughput {old['throughput_per_sec']:.1f} -> "
+                               f"{result['throughput_per_sec']:.1f}/s")
+    return regressions
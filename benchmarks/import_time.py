@@ -0,0 +1,84 @@
+"""Startup import-time report for the Streamlit app (like `python -X importtime`).
+
+    python benchmarks/import_time.py               # report, fail if a heavy module leaks into startup
+    python benchmarks/import_time.py --budget-ms 1500
+
+Imports every module main.py imports at the top level in a fresh interpreter, prints the slowest
+imports and exits non-zero when a page-scoped dependency (keras, tensorflow, cv2, pandas, folium,
+geopy, deep_translator, ...) is pulled in at startup or the total goes over the budget.
+tests/test_import_time.py runs the same check under pytest.
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported by the page that uses them
+PAGE_SCOPED = ["keras", "tensorflow", "tflite_runtime", "ai_edge_litert", "onnxruntime", "cv2", "pandas",
+               "folium", "streamlit_folium", "geopy", "deep_translator"]
+
+
+# Function to list the modules main.py imports at module level (not inside pages or functions)
+def startup_imports(path=os.path.join(ROOT, "main.py")):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+# Function to import modules in a clean interpreter and parse the -X importtime output
+def import_times(modules):
+    code = "".join(f"import {name}\n" for name in modules)
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise SystemExit(completed.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.rstrip()
+        # Nesting is shown by indentation; depth 1 means imported directly by the -c code (or site)
+        depth = (len(name) - len(name.lstrip())) // 2 + 1
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+# Function to list the page-scoped modules that show up in import_times() rows
+def leaked_modules(rows):
+    loaded = {name.split(".")[0] for name, _, _, _ in rows}
+    return [name for name in PAGE_SCOPED if name in loaded]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when startup imports take longer")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    modules = startup_imports()
+    rows = import_times(modules)
+    top_level = [row for row in rows if row[1] == 1]
+    total_ms = sum(cumulative for _, _, _, cumulative in top_level) / 1000
+
+    print(f"Startup imports of main.py: {', '.join(modules)}")
+    print(f"{'module':<50}{'cumulative ms':>15}")
+    for name, _, _, cumulative in sorted(top_level, key=lambda row: -row[3])[:args.top]:
+        print(f"{name:<50}{cumulative / 1000:>15.1f}")
+    print(f"Total: {total_ms:.1f} ms")
+
+    leaked = leaked_modules(rows)
+    if leaked:
+        print(f"🚨 Page-scoped modules imported at startup: {', '.join(leaked)}")
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"🚨 Startup imports took {total_ms:.1f} ms, budget is {args.budget_ms:.1f} ms")
+    sys.exit(1 if leaked or (args.budget_ms is not None and total_ms > args.budget_ms) else 0)
@@ -0,0 +1,153 @@
+"""Load test for the inference API, optionally sweeping the number of gunicorn workers.
+
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --concurrency 32 --seconds 20
+    python benchmarks/load_test.py --sweep 1 2 4 8 --image Media/DanLeaf2.jpg --username farmer --password ...
+    python benchmarks/load_test.py --sweep 2 --check-overload
+
+With --sweep the script starts `gunicorn -c gunicorn.conf.py serve:app` once per worker count,
+waits for /readyz, runs the load and prints how throughput scales across cores.
+--check-overload then also drives each server with more clients than its workers have threads
+and exits non-zero unless admission control turned some of them away with a 503.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import percentile
+
+
+# One client: posts the image as raw bytes to /predict in a loop with its own keep-alive session
+def client(url, image, deadline, latencies, statuses, lock, token=None):
+    session = requests.Session()
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    local, codes = [], {}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            status = session.post(url + "/predict", data=image, headers={"Content-Type": "image/jpeg"},
+                                  timeout=60).status_code
+        except requests.RequestException:
+            status = "error"
+        if status == 200:
+            local.append(time.perf_counter() - start)
+        codes[status] = codes.get(status, 0) + 1
+    with lock:
+        latencies.extend(local)
+        for status, count in codes.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+
+# Function to get an API token from /login (None when no credentials were given)
+def login(url, username, password):
+    if not username:
+        return None
+    response = requests.post(url + "/login", json={"username": username, "password": password}, timeout=30)
+    if response.status_code != 200:
+        raise SystemExit(f"❌ Login failed: {response.status_code} {response.text.strip()}")
+    return response.json()["token"]
+
+
+def run_load(url, image, concurrency, seconds, credentials=(None, None)):
+    token = login(url, *credentials)
+    latencies, statuses, lock = [], {}, threading.Lock()
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(url, image, deadline, latencies, statuses, lock, token))
+               for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    return {"throughput_per_sec": len(latencies) / seconds, "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000, "p99_ms": percentile(latencies, 99) * 1000,
+            "statuses": statuses}
+
+
+# Function to start gunicorn with a given number of workers and wait until it reports ready
+# (each worker may load its own model, so several readiness checks in a row have to pass)
+def start_server(workers, port, threads, ready_timeout=300):
+    env = dict(os.environ, LEAF_API_WORKERS=str(workers), LEAF_API_THREADS=str(threads),
+               LEAF_API_BIND=f"127.0.0.1:{port}")
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "serve:app"],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + ready_timeout
+    ready = 0
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"❌ gunicorn exited with code {server.returncode}")
+        try:
+            ready = ready + 1 if requests.get(f"http://127.0.0.1:{port}/readyz", timeout=1).status_code == 200 else 0
+        except requests.RequestException:
+            ready = 0
+        if ready >= workers * 4:
+            return server
+        time.sleep(0.5 if ready == 0 else 0.05)
+    server.terminate()
+    raise SystemExit("❌ Server did not become ready in time")
+
+
+def print_row(label, result):
+    print(f"{label:<12}{result['throughput_per_sec']:>12.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+          f"{result['p99_ms']:>10.1f}  {result['statuses']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--image", default=os.path.join(ROOT, "Media", "DanLeaf2.jpg"))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--sweep", type=int, nargs="+", help="Worker counts to start gunicorn with")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("LEAF_API_THREADS", "8")),
+                        help="Threads per gunicorn worker with --sweep")
+    parser.add_argument("--check-overload", action="store_true",
+                        help="Fail unless overloading the server gets some requests a 503")
+    parser.add_argument("--username", default=os.environ.get("LEAF_API_USER"), help="Account to get a token for")
+    parser.add_argument("--password", default=os.environ.get("LEAF_API_PASSWORD", ""))
+    args = parser.parse_args()
+    credentials = (args.username, args.password)
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+
+    print(f"{'workers':<12}{'req/sec':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    if not args.sweep:
+        result = run_load(args.url.rstrip("/"), image, args.concurrency, args.seconds, credentials)
+        print_row("external", result)
+        # Against an external server, --concurrency has to be above its total thread count
+        sys.exit(1 if args.check_overload and not result["statuses"].get(503) else 0)
+
+    baseline = None
+    not_shedding = []
+    for workers in args.sweep:
+        server = start_server(workers, args.port, args.threads)
+        try:
+            result = run_load(f"http://127.0.0.1:{args.port}", image, args.concurrency, args.seconds, credentials)
+            if args.check_overload:
+                # Twice as many clients as the server has threads, so every worker is saturated
+                overload = run_load(f"http://127.0.0.1:{args.port}", image, workers * args.threads * 2,
+                                    args.seconds, credentials)
+        finally:
+            server.terminate()
+            server.wait()
+        baseline = baseline or result["throughput_per_sec"]
+        print_row(str(workers), result)
+        print(f"{'':<12}speed-up x{result['throughput_per_sec'] / baseline:.2f}" if baseline else "")
+        if args.check_overload:
+            print_row(f"{workers} overload", overload)
+            if not overload["statuses"].get(503):
+                not_shedding.append(workers)
+
+    if not_shedding:
+        print(f"🚨 No 503s under overload with {', '.join(map(str, not_shedding))} worker(s): "
+              f"admission control never rejected anything")
+        sys.exit(1)
@@ -0,0 +1,358 @@
+"""Benchmark suite for every hot path in the app.
+
+    python benchmarks/run.py                        # run everything, write benchmarks/results.json
+    python benchmarks/run.py preprocess messages    # run a subset
+    python benchmarks/run.py --save-baseline        # store this run as benchmarks/baseline.json
+    python benchmarks/run.py --skip predict api     # everything except the model benchmarks
+
+Each benchmark runs in its own subprocess so peak RSS is measured per benchmark. Results are
+compared with the saved baseline and the run exits non-zero when something regressed, when a
+benchmark fails, or when a baseline metric is missing from the run. Use --skip to leave a
+benchmark out on purpose (e.g. without the model file).
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+from harness import compare, measure
+
+RESULTS_PATH = os.path.join(HERE, "results.json")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+
+
+# Function to make a reproducible phone-sized JPEG of leaf-ish noise
+def synthetic_jpeg(width=4000, height=3000, seed=0):
+    import cv2 as cv
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    img = cv.resize(rng.integers(0, 255, (height // 16, width // 16, 3), dtype=np.uint8), (width, height))
+    img[..., 1] = np.maximum(img[..., 1], 120)
+    return cv.imencode(".jpg", img, [cv.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def bench_preprocess(args):
+    from preprocessing import preprocess, preprocess_batch
+
+    results = []
+    for width, height in [(640, 480), (4000, 3000)]:
+        data = synthetic_jpeg(width, height)
+        # Same call as the Disease Prediction page in main.py and the API's /predict route
+        results.append(measure(f"preprocess/{width}x{height}", lambda: preprocess(data), iterations=args.iterations))
+        results.append(measure(f"preprocess_batch16/{width}x{height}", lambda: preprocess_batch([data] * 16),
+                               iterations=max(args.iterations // 5, 5), items_per_call=16))
+    return results
+
+
+def bench_predict(args):
+    import numpy as np
+    from model_registry import get_model_entry
+
+    entry = get_model_entry()
+    rng = np.random.default_rng(0)
+    results = []
+    for batch_size in [1, 2, 4, 8, 16, 32, 64]:
+        batch = rng.integers(0, 255, (batch_size, 150, 150, 3)).astype(np.float32)
+        results.append(measure(f"predict/batch{batch_size}", lambda: entry.predict(batch),
+                               iterations=max(args.iterations // 5, 5), items_per_call=batch_size))
+    return results
+
+
+# Function to import "API/Make API.py" (the file name has a space, so it can't be imported normally)
+def load_api():
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location("make_api", os.path.join(ROOT, "API", "Make API.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_api(args):
+    import numpy as np
+    from model_registry import DEFAULT_MODEL_PATH
+
+    os.environ.setdefault("LEAF_MODEL_PATH", DEFAULT_MODEL_PATH)
+    api = load_api()
+    # Every request should reach the model, not the prediction cache
+    api.prediction_cache.max_entries = 0
+    client = api.app.test_client()
+    img = np.random.default_rng(0).integers(0, 255, (150, 150, 3)).astype(np.float32)
+    headers = {"Authorization": f"Bearer {api.auth.tokens.issue('farmer7')}"}
+
+    # The client-side JSON encoding is part of the round-trip, as in "API/Request api.py"
+    def round_trip():
+        response = client.post("/", data=json.dumps({"img": img.tolist()}), content_type="application/json",
+                               headers=headers)
+        assert response.status_code == 200, response.data
+
+    return [measure("api/just_json_roundtrip", round_trip, iterations=max(args.iterations // 5, 5))]
+
+
+# Function to fill a throwaway users.db with users and `messages` chat rows
+def seed_database(path, users=200, messages=0):
+    import db
+
+    import auth
+
+    db.init_db(path)
+    conn = db.connect(path)
+    rng = random.Random(0)
+    start_time = datetime(2025, 1, 1)
+    password = auth.hash_password("secret")  # One hash for every user, at the app's real work factor
+    with conn:
+        conn.executemany("INSERT INTO users (username, password) VALUES (?, ?)",
+                         [(f"farmer{i}", password) for i in range(users)])
+        for start in range(0, messages, 100000):
+            conn.executemany(
+                "INSERT INTO messages (sender, recipient, message, timestamp) VALUES (?, ?, ?, ?)",
+                [(f"farmer{rng.randrange(users)}", None if rng.random() < 0.5 else f"farmer{rng.randrange(users)}",
+                  "Any advice for leaf spots on my tomatoes?", str(start_time + timedelta(seconds=i)))
+                 for i in range(start, min(start + 100000, messages))])
+    conn.close()
+
+
+def bench_login(args):
+    import auth
+    import db
+    from login import check_login
+
+    # API token checks: a repeat token comes from the verified-token cache, a fresh one is a signature check
+    issuer = auth.TokenIssuer(secret="bench", cache_size=0)
+    token = auth.tokens.issue("farmer7")
+    results = [measure("auth/verify_token_cached", lambda: auth.tokens.verify(token), iterations=args.iterations * 100),
+               measure("auth/verify_token_uncached", lambda: issuer.verify(issuer.issue("farmer7")),
+                       iterations=args.iterations * 100)]
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        seed_database(db.DB_PATH)
+        # Dominated by bcrypt, by design
+        results.append(measure("login/check_login", lambda: check_login("farmer7", "secret"),
+                               iterations=max(args.iterations // 5, 5)))
+        db.close_connections()
+    return results
+
+
+# Function to read a user's whole message history in one query, the way the chat page did before
+# it paged conversations; only kept here as the baseline for messages/conversation_page
+def full_history(user):
+    import db
+
+    return db.fetch_all("""
+        SELECT sender, recipient, message, timestamp FROM messages
+        WHERE recipient IS NULL OR recipient = ? OR sender = ?
+        ORDER BY timestamp ASC
+    """, (user, user))
+
+
+def bench_messages(args):
+    import db
+    from chat import get_older_messages
+
+    results = []
+    for size in args.message_rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_PATH = os.path.join(tmp, "bench.db")
+            seed_database(db.DB_PATH, messages=size)
+            results.append(measure(f"messages/get_messages/{size}", lambda: full_history("farmer7"),
+                                   iterations=max(args.iterations // 10, 3), warmup=1))
+            results.append(measure(f"messages/conversation_page/{size}",
+                                   lambda: get_older_messages("farmer7", "Everyone"),
+                                   iterations=args.iterations))
+            db.close_connections()
+    return results
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local stand-in for Nominatim (/search) and Overpass (/api/interpreter)."""
+
+    def do_GET(self):
+        if self.path.startswith("/search"):
+            body = [{"lat": "17.3850", "lon": "78.4867", "display_name": "Hyderabad, Telangana, India",
+                     "place_id": 1, "osm_type": "node", "osm_id": 1, "boundingbox": ["17.2", "17.5", "78.3", "78.6"]}]
+        else:
+            rng = random.Random(0)
+            body = {"elements": [{"type": "node", "id": i, "lat": 17.385 + rng.uniform(-0.09, 0.09),
+                                  "lon": 78.4867 + rng.uniform(-0.09, 0.09),
+                                  "tags": {"shop": "fertilizer", "name": f"Shop {i}"}} for i in range(40)]}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def bench_shops(args):
+    import geo_cache
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"127.0.0.1:{server.server_address[1]}"
+    geo_cache.NOMINATIM_DOMAIN, geo_cache.NOMINATIM_SCHEME = host, "http"
+    geo_cache.OVERPASS_URL = f"http://{host}/api/interpreter"
+
+    # Same steps as find_nearest_fertilizer_shops: geocode, then the shop query for that point
+    def lookup(cache):
+        latitude, longitude = cache.geocode("Hyderabad")
+        return cache.shops_near(latitude, longitude)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def uncached():
+            path = os.path.join(tmp, "cold.db")
+            if os.path.exists(path):
+                os.remove(path)
+            lookup(geo_cache.GeoCache(path))
+
+        warm = geo_cache.GeoCache(os.path.join(tmp, "warm.db"))
+        results = [measure("shops/uncached", uncached, iterations=args.iterations),
+                   measure("shops/cached", lambda: lookup(warm), iterations=args.iterations)]
+    server.shutdown()
+    return results
+
+
+def bench_doses(args):
+    import numpy as np
+    import pandas as pd
+    from dose_planner import CROP_KEYS, plan
+
+    rng = np.random.default_rng(0)
+    results = []
+    for size in args.plot_rows:
+        plots = pd.DataFrame({"plot": np.arange(size), "crop": rng.choice(CROP_KEYS, size),
+                              "area": rng.uniform(0.1, 20, size).round(2)})
+        # Same call as the Dose Calculator's bulk mode after the upload has been parsed
+        results.append(measure(f"doses/plan/{size}", lambda: plan(plots), iterations=max(args.iterations // 10, 5),
+                               items_per_call=size))
+    return results
+
+
+def bench_predlog(args):
+    import numpy as np
+    from prediction_log import PredictionLog
+
+    rng = np.random.default_rng(0)
+    now = datetime(2025, 6, 1).timestamp()
+    with tempfile.TemporaryDirectory() as tmp:
+        log = PredictionLog(os.path.join(tmp, "bench_log.db"))
+        # Events spread over 90 days around Hyderabad, written the way the background writer does
+        for start in range(0, args.event_rows, 100000):
+            size = min(100000, args.event_rows - start)
+            log.write_batch(list(zip((now - rng.uniform(0, 90 * 86400, size)).tolist(), ["farmer"] * size,
+                                     ["app"] * size, rng.integers(0, 33, size).tolist(),
+                                     rng.uniform(0.3, 1, size).tolist(), rng.normal(17.4, 1.5, size).tolist(),
+                                     rng.normal(78.5, 1.5, size).tolist())))
+        rows = args.event_rows
+        results = [
+            measure("predlog/log_enqueue", lambda: log.log(5, 0.93, "farmer7", 17.38, 78.48),
+                    iterations=args.iterations * 100),
+            measure(f"predlog/top_50km_7d/{rows}",
+                    lambda: log.top_diseases(17.385, 78.487, radius_km=50, days=7, now=now),
+                    iterations=args.iterations),
+            measure(f"predlog/top_all_30d/{rows}", lambda: log.top_diseases(days=30, now=now),
+                    iterations=args.iterations),
+            measure(f"predlog/top_crop_90d/{rows}", lambda: log.top_diseases(days=90, crop="Tomato", now=now),
+                    iterations=args.iterations),
+        ]
+        log.flush()
+    return results
+
+
+BENCHMARKS = {
+    "preprocess": bench_preprocess,
+    "predict": bench_predict,
+    "api": bench_api,
+    "login": bench_login,
+    "messages": bench_messages,
+    "shops": bench_shops,
+    "doses": bench_doses,
+    "predlog": bench_predlog,
+}
+
+
+class BenchmarkFailed(Exception):
+    pass
+
+
+# Function to run one benchmark in a fresh interpreter and collect its JSON results (tagged with the benchmark)
+def run_isolated(name, args):
+    command = [sys.executable, os.path.abspath(__file__), "--child", name, "--iterations", str(args.iterations),
+               "--message-rows", *map(str, args.message_rows), "--plot-rows", *map(str, args.plot_rows),
+               "--event-rows", str(args.event_rows)]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+    if completed.returncode != 0:
+        stderr = completed.stderr.strip()
+        raise BenchmarkFailed(stderr.splitlines()[-1] if stderr else f"exit code {completed.returncode}")
+    return [dict(result, benchmark=name) for result in json.loads(completed.stdout.strip().splitlines()[-1])]
+
+
+def print_table(results):
+    print(f"{'benchmark':<40}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'per sec':>12}{'peak MB':>10}")
+    for r in results:
+        print(f"{r['name']:<40}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['throughput_per_sec']:>12.1f}{r['peak_rss_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leaf disease app benchmarks")
+    parser.add_argument("benchmarks", nargs="*", help=f"Subset to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--message-rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--plot-rows", type=int, nargs="+", default=[10000, 1000000])
+    parser.add_argument("--event-rows", type=int, default=1000000, help="Prediction log events to seed")
+    parser.add_argument("--skip", nargs="+", default=[], help="Benchmarks to leave out on purpose")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(BENCHMARKS[args.child](args)))
+        sys.exit(0)
+
+    unknown = (set(args.benchmarks) | set(args.skip)) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    selected = [name for name in args.benchmarks or BENCHMARKS if name not in args.skip]
+    results, failed = [], []
+    for name in selected:
+        try:
+            results.extend(run_isolated(name, args))
+        except BenchmarkFailed as e:
+            print(f"❌ {name} failed: {e}")
+            failed.append(name)
+    print_table(results)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    if failed:
+        # A failed benchmark is never a pass, and must not become part of a baseline
+        sys.exit(f"🚨 {len(failed)} benchmark(s) failed: {', '.join(failed)}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, set(selected))
+        for line in regressions:
+            print(f"🚨 Regression: {line}")
+        if regressions:
+            sys.exit(1)
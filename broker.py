@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import deque
+
+
+# Function to name the channel a message belongs to ("public" or one per pair of users)
+def topic_for(user, recipient):
+    if recipient is None or recipient == "Everyone":
+        return "public"
+    return "dm:" + "|".join(sorted((user, recipient)))
+
+
+class MessageBroker:
+    """In-process pub/sub that tells chat sessions when their conversation has new rows in SQLite.
+
+    Messages themselves stay in the database; the broker only carries a per-topic sequence number
+    and the time it was published, so subscribers know when a fetch is worth doing.
+    """
+
+    def __init__(self, latency_samples=10000):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._topics = {}
+        self.published = 0
+        self.delivered = 0
+        self.latencies = deque(maxlen=latency_samples)
+
+    def publish(self, topic):
+        with self._cond:
+            self._seq += 1
+            self._topics[topic] = (self._seq, time.time())
+            self.published += 1
+            self._cond.notify_all()
+        return self._seq
+
+    # Function to get the latest (sequence, published_at) of a topic, (0, None) if nothing was sent yet
+    def version(self, topic):
+        with self._cond:
+            return self._topics.get(topic, (0, None))
+
+    # Function to block until the topic moves past `since` or the timeout runs out
+    def wait(self, topic, since, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._topics.get(topic, (0, None))[0] > since, timeout)
+            return self._topics.get(topic, (0, None))
+
+    # Function to record end-to-end delivery latency once a subscriber has shown the new rows
+    def record_delivery(self, published_at):
+        if published_at is None:
+            return
+        with self._cond:
+            self.delivered += 1
+            self.latencies.append(time.time() - published_at)
+
+    def stats(self):
+        with self._cond:
+            latencies = sorted(self.latencies)
+        stats = {"published": self.published, "delivered": self.delivered, "topics": len(self._topics)}
+        if latencies:
+            stats.update({
+                "latency_p50_ms": latencies[len(latencies) // 2] * 1000,
+                "latency_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+                "latency_max_ms": latencies[-1] * 1000,
+            })
+        return stats
+
+
+# Shared by every Streamlit session in this process
+broker = MessageBroker()
@@ -0,0 +1,173 @@
+"""Classify a whole field-survey folder (or .zip/.tar archive) of leaf photos.
+
+    python bulk_classify.py survey_photos/ -o results.csv
+    python bulk_classify.py survey.zip -o results.jsonl --batch-size 64 --workers 8
+
+Output format follows the extension: .csv, .jsonl (one object per line) or .json (one array).
+
+Images are decoded and resized in a process pool, fed through a bounded prefetch window and
+predicted in batches; results are written as they are produced, so memory stays flat however
+many images the survey has.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from disease_data import label_name
+from model_registry import DEFAULT_MODEL_PATH
+from preprocessing import preprocess
+from treatment_catalogue import CATALOGUE
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+# Function to list the images of a directory or archive as (name, path or bytes) without loading them all
+def iter_sources(source):
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, source), path
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and os.path.splitext(info.filename)[1].lower() in IMAGE_EXTENSIONS:
+                    yield info.filename, archive.read(info)
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile() and os.path.splitext(member.name)[1].lower() in IMAGE_EXTENSIONS:
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise ValueError(f"{source} is not a directory, zip or tar archive")
+
+
+# Worker: decode and resize one image with the shared preprocessing, None if it can't be decoded
+def decode(item):
+    name, data = item
+    if isinstance(data, str):
+        with open(data, "rb") as f:
+            data = f.read()
+    return name, preprocess(data)
+
+
+# Function to decode in parallel while keeping at most `prefetch` images in flight. Workers are
+# spawned rather than forked: the model is already loaded here, and TensorFlow's threads don't survive a fork.
+def decoded_images(source, workers, prefetch):
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        for item in iter_sources(source):
+            pending.append(pool.submit(decode, item))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Function to get the disease_treatments key for a class (every class has one, see treatment_catalogue)
+def treatment_key(class_id):
+    return CATALOGUE[class_id].label
+
+
+class ResultWriter:
+    """Streams result rows to CSV, JSONL or a JSON array (picked from the output file extension)."""
+
+    FIELDS = ["file", "label", "confidence", "treatment_key", "error"]
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8") if path != "-" else sys.stdout
+        self.format = os.path.splitext(path)[1].lower().lstrip(".") if path != "-" else "csv"
+        if self.format not in ("jsonl", "json"):
+            self.format = "csv"
+            self.csv = csv.DictWriter(self.file, fieldnames=self.FIELDS)
+            self.csv.writeheader()
+        # A .json file is one array, opened here and closed in close(), so rows can still be streamed
+        self.rows_written = 0
+        if self.format == "json":
+            self.file.write("[")
+
+    def write(self, rows):
+        for row in rows:
+            if self.format == "jsonl":
+                self.file.write(json.dumps(row) + "\n")
+            elif self.format == "json":
+                self.file.write(("," if self.rows_written else "") + "\n  " + json.dumps(row))
+            else:
+                self.csv.writerow(row)
+            self.rows_written += 1
+        self.file.flush()
+
+    def close(self):
+        if self.format == "json":
+            self.file.write("\n]\n" if self.rows_written else "]\n")
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+# Function to classify one batch and turn predictions into result rows
+def predict_rows(model_entry, names, images):
+    predictions = model_entry.predict(np.stack(images))
+    best = np.argmax(predictions, axis=1)
+    return [{"file": name, "label": label_name[idx], "confidence": round(float(predictions[i][idx]) * 100, 2),
+             "treatment_key": treatment_key(idx), "error": ""}
+            for i, (name, idx) in enumerate(zip(names, best))]
+
+
+def classify(source, output, model_path=DEFAULT_MODEL_PATH, batch_size=32, workers=None, prefetch=None):
+    from model_registry import get_model_entry
+
+    model_entry = get_model_entry(model_path)
+    workers = workers or os.cpu_count() or 1
+    prefetch = prefetch or batch_size * 4
+    writer = ResultWriter(output)
+    names, images = [], []
+    total = failed = 0
+    start = time.perf_counter()
+    try:
+        for name, image in decoded_images(source, workers, prefetch):
+            if image is None:
+                failed += 1
+                writer.write([{"file": name, "label": "", "confidence": "", "treatment_key": "",
+                               "error": "could not decode image"}])
+                continue
+            names.append(name)
+            images.append(image)
+            if len(images) == batch_size:
+                writer.write(predict_rows(model_entry, names, images))
+                total += len(images)
+                names, images = [], []
+                elapsed = time.perf_counter() - start
+                print(f"\r{total} images, {total / elapsed:.1f} images/sec", end="", file=sys.stderr)
+        if images:
+            writer.write(predict_rows(model_entry, names, images))
+            total += len(images)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ {total} images classified ({failed} unreadable) in {elapsed:.1f}s, "
+          f"{total / elapsed if elapsed else 0:.1f} images/sec", file=sys.stderr)
+    return total, failed, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk leaf disease classification for survey folders")
+    parser.add_argument("source", help="Directory, .zip or .tar(.gz) of images")
+    parser.add_argument("-o", "--output", default="-", help="Output .csv, .jsonl or .json file (default: CSV to stdout)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="Decode processes (default: CPU count)")
+    parser.add_argument("--prefetch", type=int, default=None, help="Max decoded images in flight")
+    args = parser.parse_args()
+    classify(args.source, args.output, args.model, args.batch_size, args.workers, args.prefetch)
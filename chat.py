@@ -1,49 +1,124 @@
 import streamlit as st
-import sqlite3
+import db
+import metrics
+import time
 from datetime import datetime
-
-# Function to get database connection
-def get_db_connection():
-    return sqlite3.connect("users.db", check_same_thread=False)
+from broker import broker, topic_for
 
 # Function to fetch registered users (excluding the current user)
+@metrics.timed("db.get_registered_users")
 def get_registered_users(current_user):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT username FROM users WHERE username != ?", (current_user,))
-    users = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return users
+    rows = db.fetch_all("SELECT username FROM users WHERE username != ?", (current_user,))
+    return [row[0] for row in rows]
 
 # Function to send a direct or broadcast message
+@metrics.timed("db.send_message")
 def send_message(sender, recipient, message):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # If recipient is "Everyone", store NULL (indicating a broadcast message)
     if recipient == "Everyone":
-        cursor.execute("INSERT INTO messages (sender, recipient, message, timestamp) VALUES (?, NULL, ?, ?)", 
-                       (sender, message, datetime.now()))
+        db.execute("INSERT INTO messages (sender, recipient, message, timestamp) VALUES (?, NULL, ?, ?)", 
+                   (sender, message, datetime.now()))
     else:
-        cursor.execute("INSERT INTO messages (sender, recipient, message, timestamp) VALUES (?, ?, ?, ?)", 
-                       (sender, recipient, message, datetime.now()))
-
-    conn.commit()
-    conn.close()
-
-# Function to fetch messages (for a user or globally)
-def get_messages(user):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT sender, recipient, message, timestamp FROM messages
-        WHERE recipient IS NULL OR recipient = ? OR sender = ?
-        ORDER BY timestamp ASC
-    """, (user, user))
-    
-    messages = cursor.fetchall()
-    conn.close()
-    return messages
+        db.execute("INSERT INTO messages (sender, recipient, message, timestamp) VALUES (?, ?, ?, ?)", 
+                   (sender, recipient, message, datetime.now()))
+
+    # Notify every open session showing this conversation
+    broker.publish(topic_for(sender, recipient))
+
+# Number of messages loaded per page ("Load older" fetches another page)
+PAGE_SIZE = 50
+# How often the open conversation checks the broker, and how often it re-reads SQLite anyway
+# (to pick up messages written by other processes, which the in-process broker can't see)
+REFRESH_SECONDS = 1
+FALLBACK_POLL_SECONDS = 30
+
+# Function to build the WHERE clauses of one conversation (each one can use an index on its own)
+def conversation_filters(user, recipient):
+    if recipient == "Everyone":
+        return [("recipient IS NULL", ())]
+    return [("sender = ? AND recipient = ?", (user, recipient)),
+            ("sender = ? AND recipient = ?", (recipient, user))]
+
+def _fetch_conversation(user, recipient, cursor_sql, cursor_params, order_by, limit):
+    parts, params = [], []
+    for where, where_params in conversation_filters(user, recipient):
+        parts.append(f"""
+            SELECT * FROM (
+                SELECT rowid AS id, sender, recipient, message, timestamp FROM messages
+                WHERE {where}{cursor_sql}
+                ORDER BY {order_by} LIMIT ?
+            )""")
+        params += [*where_params, *cursor_params, limit]
+    sql = " UNION ALL ".join(parts) + f" ORDER BY {order_by} LIMIT ?"
+    return db.fetch_all(sql, (*params, limit))
+
+# Function to fetch one page of a conversation older than the (timestamp, id) cursor, oldest first
+@metrics.timed("db.get_older_messages")
+def get_older_messages(user, recipient, before=None, limit=PAGE_SIZE):
+    cursor_sql, cursor_params = ("", ()) if before is None else (" AND (timestamp, rowid) < (?, ?)", tuple(before))
+    rows = _fetch_conversation(user, recipient, cursor_sql, cursor_params, "timestamp DESC, id DESC", limit)
+    return rows[::-1]
+
+# Function to fetch the messages inserted after the highest id the session has seen, in insert order.
+# Timestamps come from the sender's clock, so a message can commit after one with a later timestamp.
+@metrics.timed("db.get_new_messages")
+def get_new_messages(user, recipient, after_id, limit=PAGE_SIZE * 10):
+    return _fetch_conversation(user, recipient, " AND rowid > ?", (after_id,), "id ASC", limit)
+
+# Function to keep the loaded part of a conversation in session state and top it up incrementally
+def load_conversation(username, recipient):
+    key = f"chat_history::{recipient}"
+    history = st.session_state.get(key)
+    seq, published_at = broker.version(topic_for(username, recipient))
+    now = time.time()
+    if history is None or history["user"] != username:
+        rows = get_older_messages(username, recipient)
+        history = st.session_state[key] = {"user": username, "messages": rows, "has_more": len(rows) == PAGE_SIZE,
+                                           "last_id": max((row[0] for row in rows), default=0),
+                                           "seq": seq, "checked_at": now}
+    elif seq != history["seq"] or now - history["checked_at"] >= FALLBACK_POLL_SECONDS:
+        # Only touch the database when the broker says something changed (or the fallback poll is due)
+        new_rows = get_new_messages(username, recipient, history["last_id"])
+        history["messages"].extend(new_rows)
+        if new_rows:
+            history["last_id"] = new_rows[-1][0]
+        if new_rows and seq != history["seq"]:
+            broker.record_delivery(published_at)
+        history["seq"], history["checked_at"] = seq, now
+    return history
+
+def load_older(username, recipient):
+    history = st.session_state[f"chat_history::{recipient}"]
+    first = history["messages"][0]
+    rows = get_older_messages(username, recipient, (first[4], first[0]))
+    history["messages"] = rows + history["messages"]
+    history["has_more"] = len(rows) == PAGE_SIZE
+
+# Only this fragment reruns when new messages arrive or a message is sent, not the whole app
+@st.fragment(run_every=REFRESH_SECONDS)
+def conversation(username, recipient):
+    # Only this conversation is read, and only messages newer than the ones already loaded
+    history = load_conversation(username, recipient)
+    if history["has_more"] and history["messages"]:
+        st.button("⬆️ Load older", on_click=load_older, args=(username, recipient))
+
+    for _, sender, recp, message, timestamp in history["messages"]:
+        if recp is None:  # Global message
+            with st.chat_message("assistant"):
+                st.write(f"🌍 **{sender}** (Broadcast): {message} ({timestamp})")
+        else:
+            with st.chat_message("user" if sender == username else "assistant"):
+                st.write(f"**{sender}**: {message} ({timestamp})")
+
+    # Input for new message
+    message_input = st.text_input("💬 Type your message:", key="chat_input")
+
+    if st.button("Send"):
+        if message_input.strip():
+            send_message(username, recipient, message_input)
+            st.rerun(scope="fragment")  # Refresh only the conversation to show the new message
+        else:
+            st.error("❌ Message cannot be empty.")
 
 # Streamlit Chat UI for Direct & Broadcast Messaging
 def chat():
@@ -69,22 +144,4 @@ def chat():
         chat_title = "🌍 Public Chat" if recipient == "Everyone" else f"📩 Chat with {recipient}"
         st.subheader(chat_title)
 
-        # Display previous messages (including global messages)
-        messages = get_messages(username)
-        for sender, recp, message, timestamp in messages:
-            if recp is None:  # Global message
-                with st.chat_message("assistant"):
-                    st.write(f"🌍 **{sender}** (Broadcast): {message} ({timestamp})")
-            elif sender == username or recp == username:
-                with st.chat_message("user" if sender == username else "assistant"):
-                    st.write(f"**{sender}**: {message} ({timestamp})")
-
-        # Input for new message
-        message_input = st.text_input("💬 Type your message:", key="chat_input")
-
-        if st.button("Send"):
-            if message_input.strip():
-                send_message(username, recipient, message_input)
-                st.rerun()  # Refresh chat to show the new message
-            else:
-                st.error("❌ Message cannot be empty.")
+        conversation(username, recipient)
@@ -0,0 +1,221 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Shared data-access layer for users.db (login, chat and setup_db all go through here)
+DB_PATH = os.environ.get("LEAF_DB_PATH", "users.db")
+
+# Applied to every new connection. WAL lets readers run while a writer commits.
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+    "PRAGMA foreign_keys = ON",
+]
+# Number of prepared statements sqlite3 keeps per connection
+STATEMENT_CACHE_SIZE = 256
+# Connections kept open per database file, and seconds to wait for one when all are in use
+POOL_SIZE = int(os.environ.get("LEAF_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.environ.get("LEAF_DB_POOL_TIMEOUT", "10"))
+
+
+# Function to bcrypt-hash passwords stored in plaintext by older versions (see auth.py)
+def _hash_plaintext_passwords(conn):
+    from auth import hash_plaintext_passwords
+
+    hash_plaintext_passwords(conn)
+
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = [
+    # 1: initial schema (previously created by setup_db.py)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender TEXT NOT NULL,
+            recipient TEXT,  -- Can be NULL for broadcast messages
+            message TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ],
+    # 2: indexes for per-conversation chat queries and keyset pagination
+    [
+        "CREATE INDEX IF NOT EXISTS idx_messages_recipient_timestamp ON messages (recipient, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_sender_timestamp ON messages (sender, timestamp)",
+    ],
+    # 3: passwords are stored as bcrypt hashes
+    [
+        _hash_plaintext_passwords,
+    ],
+    # 4: indexes for fetching new chat messages by id (rowid is the implied last column of each index)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_messages_recipient ON messages (recipient)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_sender_recipient ON messages (sender, recipient)",
+    ],
+]
+
+_pools = {}
+_pools_lock = threading.Lock()
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+# Function to open a tuned connection
+def connect(path=None):
+    conn = sqlite3.connect(path or DB_PATH, timeout=5, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """Up to `size` open connections to one database file, shared by every thread.
+
+    Streamlit runs each rerun on a new thread, so connections are handed out per query rather
+    than kept per thread; they stay open (with their PRAGMAs and statement cache) between reruns.
+    """
+
+    def __init__(self, path, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.opened = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    # Function to take an idle connection, open a new one while under `size`, or else wait for one
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self.opened < self.size
+            if can_open:
+                self.opened += 1
+        if can_open:
+            try:
+                return connect(self.path)
+            except Exception:
+                with self._lock:
+                    self.opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"No free connection to {self.path} after {self.timeout}s")
+
+    def _discard(self, conn):
+        with self._lock:
+            self.opened -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        try:
+            yield conn
+        except BaseException:
+            # The connection may be mid-transaction or broken, so it isn't handed to anyone else
+            self._discard(conn)
+            raise
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    # Function to close the idle connections (ones checked out are closed when they come back)
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def stats(self):
+        return {"open": self.opened, "idle": self._idle.qsize(), "size": self.size}
+
+
+# Function to get the shared pool for a database file, migrating the schema the first time
+def get_pool(path=None):
+    path = path or DB_PATH
+    pool = _pools.get(path)
+    if pool is None:
+        if path not in _initialized:
+            init_db(path)
+        with _pools_lock:
+            pool = _pools.setdefault(path, ConnectionPool(path))
+    return pool
+
+
+# Function to borrow a pooled connection for the duration of a with block
+def connection(path=None):
+    return get_pool(path).connection()
+
+
+# Function to close every pool's idle connections (e.g. before deleting a database file)
+def close_connections():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# SQLite connections must not be shared with a forked child, so it starts with empty pools
+os.register_at_fork(after_in_child=_pools.clear)
+
+
+# Function to bring a database file up to the latest schema version
+def init_db(path=None):
+    path = path or DB_PATH
+    with _init_lock:
+        conn = connect(path)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                with conn:
+                    for statement in statements:
+                        if callable(statement):
+                            statement(conn)
+                        else:
+                            conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {number}")
+        finally:
+            conn.close()
+        _initialized.add(path)
+    return len(MIGRATIONS)
+
+
+def fetch_one(sql, params=(), path=None):
+    with connection(path) as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def fetch_all(sql, params=(), path=None):
+    with connection(path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+# Function to run a write statement in its own transaction
+def execute(sql, params=(), path=None):
+    with connection(path) as conn:
+        with conn:
+            return conn.execute(sql, params)
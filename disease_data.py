@@ -0,0 +1,89 @@
+# Static crop, disease and treatment data shared by the app, the API and the build tools
+
+fertilizer_data = {
+    "apple": {
+        "Fungicide": {"Captan": 2.268, "Mancozeb": 2.722, "Myclobutanil": 0.1134},
+        "Insecticide": {"Imidacloprid": 0.1134, "Esfenvalerate": 0.2835},
+    },
+    "corn": {
+        "Fungicide": {"Azoxystrobin": 0.4395, "Propiconazole": 0.1701, "Mancozeb": 1.361},
+        "Insecticide": {"Chlorpyrifos": 0.946, "Lambda-cyhalothrin": 0.109},
+    },
+    "cherries": {
+        "Fungicide": {"Captan": 2.268, "Chlorothalonil": 2.126, "Sulfur": 9.072},
+        "Insecticide": {"Spinosad": 0.2835, "Malathion": 1.138},
+    },
+    "grapes": {
+        "Fungicide": {"Mancozeb": 1.361, "Sulfur": 4.536, "Captan": 1.814},
+        "Insecticide": {"Imidacloprid": 0.0567, "Bifenthrin": 0.1814},
+    },
+    "peaches": {
+        "Fungicide": {"Chlorothalonil": 2.126, "Captan": 2.268, "Sulfur": 9.072},
+        "Insecticide": {"Esfenvalerate": 0.2835, "Malathion": 1.183},
+    },
+    "tomato": {
+        "Fungicide": {"Chlorothalonil": 0.946, "Mancozeb": 1.361},
+        "Insecticide": {"Spinosad": 0.2835, "Permethrin": 0.2268},
+    },
+    "pepper": {
+        "Fungicide": {"Mancozeb": 1.361, "Chlorothalonil": 0.946},
+        "Insecticide": {"Imidacloprid": 0.0567, "Spinosad": 0.2835},
+    },
+    "potato": {
+        "Fungicide": {"Mancozeb": 0.907, "Chlorothalonil": 0.946},
+        "Insecticide": {"Imidacloprid": 0.0567, "Spinosad": 0.2835},
+    }
+}
+
+label_name = [
+    'Apple scab', 'Apple Black rot', 'Apple Cedar apple rust', 'Apple healthy',
+    'Cherry Powdery mildew', 'Cherry healthy', 'Corn Cercospora leaf spot Gray leaf spot',
+    'Corn Common rust', 'Corn Northern Leaf Blight', 'Corn healthy', 'Grape Black rot',
+    'Grape Esca', 'Grape Leaf blight', 'Grape healthy', 'Peach Bacterial spot',
+    'Peach healthy', 'Pepper bell Bacterial spot', 'Pepper bell healthy',
+    'Potato Early blight', 'Potato Late blight', 'Potato healthy',
+    'Strawberry Leaf scorch', 'Strawberry healthy', 'Tomato Bacterial spot',
+    'Tomato Early blight', 'Tomato Late blight', 'Tomato Leaf Mold',
+    'Tomato Septoria leaf spot', 'Tomato Spider mites', 'Tomato Target Spot',
+    'Tomato Yellow Leaf Curl Virus', 'Tomato mosaic virus', 'Tomato healthy'
+]
+
+# Shown for the healthy classes, which have no treatment
+NO_DISEASE = 'No disease detected.'
+
+# One treatment text per model class, keyed by the exact label_name entry (checked by treatment_catalogue.py)
+disease_treatments = {
+    'Apple scab': 'Cause:Apple scab is caused by the fungal pathogen Venturia inaequalis. It thrives in wet and humid conditions, leading to dark, scaly lesions on leaves and fruit.Treatment :Use fungicides such as fixed copper, Bordeaux mixtures, copper soaps (copper octanoate), sulfur, mineral or neem oils, and myclobutanil.Myclobutanil is a synthetic fungicide, while the others are considered organically acceptable.Apply copper- or sulfur-based protectant sprays to prevent the disease.',
+    'Apple Black rot': 'Cause:Apple black rot is caused by the fungus Diplodia seriata. The disease is promoted by warm temperatures, frequent rain, and prolonged wet conditions, which facilitate fruit infection. Treatment:Apply copper-based products, lime-sulfur, Daconil, Ziram, or Mancozeb as fungicidal treatments.Remove mummified fruit (shriveled and dried fruit) attached to the tree to prevent further spread.',
+    'Apple Cedar apple rust': 'Cause:Cedar apple rust is caused by multiple fungal species from the genus Gymnosporangium. This disease requires both apple and juniper trees for its life cycle, making proximity a key factor in its spread.Treatment:Use fungicides containing myclobutanil, which are the most effective in preventing rust.Copper and sulfur-based products can also be applied.Maintain a minimum distance of one mile between apple and juniper trees to reduce infection risk.',
+    'Apple healthy': NO_DISEASE,
+    'Cherry Powdery mildew': 'Cause:Cherry powdery mildew is caused by the fungus Podosphaera clandestina. It thrives in warm, humid conditions with low rainfall.Treatment:Apply fungicides soon after petal fall and repeat 2 to 3 weeks later if necessary.Recommended fungicides include:Bonide Sulfur Plant Fungicide,Hi-Yield Snake Eyes Dusting Wettable Sulfur,Monterey Horticultural Oil,Spectracide IMMUNOX Multi-Purpose Fungicide Spray Concentrate,Tebucon 45 DF, Tesaris, Topguard SC, Topguard EQ, Topsin 4.5 FL, Torino.',
+    'Cherry healthy': NO_DISEASE,
+    'Corn Cercospora leaf spot Gray leaf spot': 'Cause:Cercospora leaf spot is caused by multiple species of Cercospora fungi. The disease spreads via airborne conidia (fungal spores transported through the air).Treatment:Apply fungicides, including:Mancozeb (400 g/acre),Copper oxychloride (500 g/acre),Carbendazim (200 g/acre),Propiconazole (200 ml/acre),Metiram (200 g/acre),Kresoxim-methyl (200 ml/acre),SYSTHANE (contains myclobutanil),HERITAGE (contains azoxystrobin).Remove infected plant material to prevent further spread.',
+    'Corn Common rust': 'Cause:Common rust in corn is caused by the fungus Puccinia sorghi.Treatment:Use fungicides such as:Chlorothalonil,Mancozeb,Kresoxim-methyl,Tebuconazole,Pyraclostrobin,Azoxystrobin,Plant corn hybrids with genetic resistance to the disease.',
+    'Corn Northern Leaf Blight': 'Cause:Northern leaf blight in corn is caused by the fungus Exserohilum turcicum.Treatment:Apply appropriate fungicides to control the infection.Use endophytic Trichoderma as a biological control agent to suppress the disease.',
+    'Corn healthy': NO_DISEASE,
+    'Grape Black rot': 'Black rot thrives in humid climates, with berries remaining highly susceptible for 3-5 weeks after cap fall and becoming immune after 2 more weeks. The primary infection source is mummified berries from the previous season, making vineyard sanitation crucial for prevention. The disease spreads from leaves to fruit, potentially causing complete crop loss in severe cases. Effective control includes fungicides like mancozeb and ziram, while DMIs and strobilurins (e.g., Abound, Aprovia Top, Pristine, Quadris Top) provide strong protection.',
+    'Grape Esca': 'Esca disease is caused by fungi like Phaeomoniella chlamydospora and Phaeoacremonium minimum, which enter through wounds and spread via the vines vascular system.Common symptoms include yellowing or reddening of leaves, necrotic shoots, and cankers on vine wood. Early detection is crucial to prevent severe damage.Sterilizing pruning tools with disinfectants helps reduce the spread of infection between plants.Fungicide and bactericide treatments can help control the disease, and selecting resistant grape varieties offers long-term protection.Maintaining well-drained soil and proper root management prevents water stagnation and enhances vine health.',
+    'Grape Leaf blight': 'Bacterial blight of grapevine, caused by Xanthomonas ampelina, spreads through pruning tools and enters healthy tissues via wounds, especially in wet conditions. Early symptoms include reddish-brown streaks, cankers, and shoot dieback.Severely infected vines appear stunted, with dead leaves and blackened flowers. Infected roots result in poor shoot growth, affecting vine health.The disease can cause serious harvest losses, requiring laboratory confirmation for accurate diagnosis.Preventive measures include sterilizing tools, sourcing healthy plants, regular vineyard monitoring, and enforcing hygiene protocols.Following biosecurity practices, such as “Come clean, Go clean,” helps prevent the spread of bacterial blight.',
+    'Grape healthy': NO_DISEASE,
+    'Peach Bacterial spot': 'Peach bacterial spot caused by Xanthomonas arboricola pv. pruni, affects leaves, fruit, and twigs, leading to dark water-soaked lesions, yellowing, and premature leaf drop. Severe infections reduce fruit quality and yield.The disease spreads through wind, rain, and infected plant material, thriving in warm, humid conditions. Symptoms include small dark spots on fruit that enlarge and crack, causing blemishes.To prevent bacterial spot, use resistant peach varieties and certified disease-free plants. Maintain proper pruning and airflow to reduce moisture buildup.Apply copper-based bactericides or antibiotics as preventive measures during the growing season. Avoid excessive nitrogen fertilization, which makes trees more vulnerable.Follow biosecurity measures like cleaning tools, removing infected plant material, and regular orchard monitoring to prevent the spread of the disease.',
+    'Peach healthy': NO_DISEASE,
+    'Pepper bell Bacterial spot': 'Cause: Xanthomonas campestris pv. vesicatoria spreads through contaminated seeds, plant debris, wind, and rain.Symptoms: Dark, water-soaked lesions on leaves, stems, and fruits, leading to defoliation and reduced yield.Prevention: Use disease-free seeds, apply copper-based bactericides, ensure good air circulation, and avoid overhead watering.',
+    'Pepper bell healthy': NO_DISEASE,
+    'Potato Early blight': 'Cause: Alternaria solani, a fungal pathogen, thrives in warm, humid conditions and spreads via wind, water, and infected debris.Symptoms: Brown concentric-ring lesions on leaves, progressing to yellowing and defoliation, reducing tuber size.Prevention: Rotate crops, apply fungicides, remove infected plant debris, and ensure proper plant nutrition to enhance resistance.',
+    'Potato Late blight': 'Cause: Phytophthora infestans, a water mold, spreads via rain, wind, and contaminated soil or tools Symptoms: Dark, water-soaked spots on leaves, white mold under humid conditions, and rapid plant decay.Prevention: Use resistant varieties, apply fungicides, avoid excess moisture, and remove infected plants immediately.',
+    'Potato healthy': NO_DISEASE,
+    'Strawberry Leaf scorch': 'Cause: Diplocarpon earlianum, a fungal pathogen, spreads in wet, humid conditions through rain splash and infected debris.Symptoms: Purple-brown leaf spots that expand, causing scorched, dried leaves, weakening plant vigor.Prevention: Improve air circulation, prune excess growth, apply fungicides, and remove infected leaves to prevent spread.',
+    'Strawberry healthy': NO_DISEASE,
+    'Tomato Bacterial spot': 'Pesticides-Actigard 50WGb alternated with copper + Mancozeb.Management Practices-Avoid sprinkler irrigation, maintain proper distance from cull piles near greenhouses or fields, and implement crop rotation with nonhost crops. Apply bactericides at intervals of 7 to 10 days, with shorter intervals recommended in conditions of rain, high humidity, and warm temperatures.',
+    'Tomato Early blight': 'Fungicide-GardenTech brand Daconil fungicides.Cultural Practices- Apply mulch, such as fabric, straw, plastic, or dried leaves, to cover the soil around plants. Employ drip irrigation to water at the base of the plants, and remove infected leaves promptly, ensuring they are either buried or burned to prevent further spread.',
+    'Tomato Late blight': 'Fungicide - Ridomil Gold (Metalaxyl 4% + Mancozeb 64%).Management Practices: Preventative fungicide sprays may be warranted if late blight is present in the surrounding area. Infected plants should be removed, destroyed, and properly disposed of to curb disease transmission.',
+    'Tomato Leaf Mold': 'Fungicide: GSC Organic Tomato Fertilizer.Cultural Practices: Maintain relative humidity below 85% and ensure night temperatures exceed outdoor temperatures, particularly in greenhouses. Utilize drip irrigation, avoid wetting the foliage, and prune or stake the plants to promote upright growth and improve airflow around the plants.',
+    'Tomato Septoria leaf spot': 'Fungicide: Organocide Plant Doctor Systemic Fungicide.Cultural Practices: Remove diseased leaves and improve air circulation around the plants. Apply mulch around the base of the plants, avoid overhead watering, and control weed growth. Crop rotation is also recommended to reduce the incidence of the disease.',
+    'Tomato Spider mites': 'Treatment: Prepare a chilli solution by mixing 20g of pounded chilli with 1 liter of water, allowing it to sit for one day, then dilute with 5 liters of water. Apply the solution weekly to control newly hatched mites. Alternatively, use a hard stream of water to dislodge the mites or apply insecticidal soaps, horticultural oils, or neem oil.',
+    'Tomato Target Spot': 'Fungicides: Chlorothalonil, copper oxychloride, or mancozeb.Management Practices: Begin treatment at the first sign of lesions and continue applications at intervals of 10 to 14 days, ceasing 3 to 4 weeks before the final harvest.',
+    'Tomato Yellow Leaf Curl Virus': 'Management Practices: Infected plants should be covered with a clear or black plastic bag tied at the stem. Cut the plant below the bag and allow it to desiccate for 1 to 2 days before disposal. No treatments exist for the virus itself; therefore, controlling whitefly populations is crucial to prevent the spread of infection.',
+    'Tomato mosaic virus': 'Management Practices: Promptly remove infected plants, as they act as a source of infection for healthy plants nearby. After handling infected plants, wash hands and tools with hot, soapy water. Sterilize tools using a disinfectant such as Virkon S to minimize cross-contamination. Additionally, avoid planting other susceptible species in proximity to infected plants.',
+    'Tomato healthy': NO_DISEASE,
+}
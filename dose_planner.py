@@ -0,0 +1,144 @@
+"""Bulk dose planning for many plots at once (the Dose Calculator's bulk mode).
+
+    python dose_planner.py plots.csv -o doses.parquet --totals totals.csv
+
+Input is a CSV or Parquet table with `plot`, `crop` and `area` (acres) columns and an optional
+`disease` column (a label_name class or class id, used to fill in a missing crop). fertilizer_data
+is compiled once into a dense crop x product rate matrix, so every plot's doses are one gather and
+the per-product totals are one matrix product over the per-crop area sums.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from disease_data import fertilizer_data
+from treatment_catalogue import CATALOGUE, CROPS
+
+ERRORS = ["", "unknown crop", "invalid area"]
+
+
+# Function to turn fertilizer_data into (crop keys, (category, product) columns, rate matrix in kg/acre)
+def rate_matrix(data=fertilizer_data):
+    crops = list(data)
+    products = list(dict.fromkeys((category, name) for crop in crops
+                                  for category, rates in data[crop].items() for name in rates))
+    column = {product: i for i, product in enumerate(products)}
+    rates = np.zeros((len(crops), len(products)))
+    for row, crop in enumerate(crops):
+        for category, items in data[crop].items():
+            for name, amount in items.items():
+                rates[row, column[(category, name)]] = amount
+    return crops, products, rates
+
+
+CROP_KEYS, PRODUCTS, RATES = rate_matrix()
+PRODUCT_COLUMNS = [f"{category}: {name} (kg)" for category, name in PRODUCTS]
+
+# Accepted spellings of each crop: the fertilizer_data key and the crop name used in label_name
+CROP_ALIASES = {key: i for i, key in enumerate(CROP_KEYS)}
+CROP_ALIASES.update({crop.lower(): CROP_KEYS.index(key) for crop, key in CROPS.values() if key in CROP_KEYS})
+CROP_ALIASES.update({prefix.lower(): CROP_KEYS.index(key) for prefix, (_, key) in CROPS.items() if key in CROP_KEYS})
+
+# Crop row for every model class (-1 when the crop has no dose data, e.g. strawberries)
+CLASS_CROP = np.array([CROP_KEYS.index(e.fertilizer_crop) if e.fertilizer_crop else -1 for e in CATALOGUE])
+CLASS_IDS = {entry.label.lower(): entry.class_id for entry in CATALOGUE}
+
+
+# Function to map a column of strings to integer codes, resolving each distinct value only once
+def _codes(values, resolve):
+    factor, uniques = pd.factorize(values)
+    table = np.array([resolve(value) for value in uniques] + [-1], dtype=np.int64)
+    return table[factor]  # factorize marks missing values as -1, which picks the trailing -1
+
+
+def _crop_code(value):
+    return CROP_ALIASES.get(str(value).strip().lower(), -1)
+
+
+# Class ids may arrive as floats ("3.0"): pandas reads an integer column with blank cells as float
+def _class_crop_code(value):
+    value = str(value).strip()
+    class_id = CLASS_IDS.get(value.lower())
+    if class_id is None:
+        try:
+            number = float(value)
+        except ValueError:
+            return -1
+        class_id = int(number) if number.is_integer() else -1
+    return CLASS_CROP[class_id] if 0 <= class_id < len(CLASS_CROP) else -1
+
+
+# Function to compute every plot's doses and the per-product totals
+def plan(plots):
+    missing = {"plot", "crop", "area"} - set(plots.columns)
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+    crop = _codes(plots["crop"], _crop_code)
+    if "disease" in plots.columns:
+        crop = np.where(crop < 0, _codes(plots["disease"], _class_crop_code), crop)
+    area = pd.to_numeric(plots["area"], errors="coerce").to_numpy(dtype=np.float64)
+
+    bad_area = ~(area > 0)  # also catches NaN
+    error = np.where(crop < 0, 1, np.where(bad_area, 2, 0))
+    valid = error == 0
+    crop_row = np.where(valid, crop, 0)
+    area = np.where(valid, area, 0.0)
+
+    # Per plot: gather each plot's crop row and scale by its area (invalid plots get zeros)
+    doses = np.take(RATES, crop_row, axis=0)
+    doses *= area[:, None]
+    # Totals: area per crop, then one (crops,) @ (crops, products) matrix product
+    crop_area = np.bincount(crop_row[valid], weights=area[valid], minlength=len(CROP_KEYS))
+    totals = crop_area @ RATES
+
+    per_plot = pd.DataFrame(doses, columns=PRODUCT_COLUMNS, index=plots.index, copy=False)
+    per_plot.insert(0, "plot", plots["plot"].to_numpy())
+    per_plot.insert(1, "crop", pd.Categorical.from_codes(np.where(crop < 0, -1, crop), CROP_KEYS))
+    per_plot.insert(2, "area", plots["area"].to_numpy())
+    if "disease" in plots.columns:
+        per_plot.insert(3, "disease", plots["disease"].to_numpy())
+    per_plot["error"] = pd.Categorical.from_codes(error, ERRORS)
+
+    summary = pd.DataFrame({"category": [c for c, _ in PRODUCTS], "product": [n for _, n in PRODUCTS],
+                            "total_kg": totals})
+    return per_plot, summary[summary["total_kg"] > 0].reset_index(drop=True)
+
+
+# Function to read plots from a CSV or Parquet path or file-like object (picked by name)
+def read_plots(source, name=None):
+    name = (name or getattr(source, "name", None) or str(source)).lower()
+    if name.endswith(".parquet"):
+        return pd.read_parquet(source)
+    return pd.read_csv(source)
+
+
+def write_table(frame, path):
+    if path.endswith(".parquet"):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False, float_format="%.4f")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan fungicide and insecticide doses for many plots")
+    parser.add_argument("plots", help="CSV or Parquet with plot, crop, area[, disease] columns")
+    parser.add_argument("-o", "--output", help="Per-plot doses (.csv or .parquet)")
+    parser.add_argument("--totals", help="Per-product totals (.csv or .parquet), printed when omitted")
+    args = parser.parse_args()
+
+    plots = read_plots(args.plots)
+    start = time.perf_counter()
+    per_plot, totals = plan(plots)
+    elapsed = time.perf_counter() - start
+    if args.output:
+        write_table(per_plot, args.output)
+    if args.totals:
+        write_table(totals, args.totals)
+    else:
+        print(totals.to_string(index=False, float_format="%.3f"))
+    errors = int((per_plot["error"] != "").sum())
+    print(f"✅ {len(plots)} plots planned in {elapsed * 1000:.1f} ms ({errors} skipped)", file=sys.stderr)
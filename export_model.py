@@ -0,0 +1,111 @@
+"""Export the Keras leaf disease model for CPU serving and check it still agrees with the original.
+
+    python export_model.py --format tflite --quantize int8 --calibration-dir samples/ --check-dir heldout/
+    python export_model.py --format onnx --check-dir heldout/
+
+The app and API pick the runtime with LEAF_MODEL_BACKEND=keras|tflite|onnx.
+"""
+import argparse
+import itertools
+import os
+
+import numpy as np
+
+from bulk_classify import decode, iter_sources
+from inference_backends import artifact_path, load_backend
+from model_registry import DEFAULT_MODEL_PATH
+
+
+# Function to load up to `limit` preprocessed images from a folder or archive as float32
+def load_images(source, limit=None):
+    for name, data in itertools.islice(iter_sources(source), limit):
+        name, image = decode((name, data))
+        if image is not None:
+            yield name, image.astype(np.float32)
+
+
+# Function to feed sample leaf images to the TFLite converter so int8 ranges match real inputs
+def representative_dataset(calibration_dir, samples):
+    def generator():
+        for _, image in load_images(calibration_dir, samples):
+            yield [image[np.newaxis]]
+    return generator
+
+
+def export_tflite(model, output, quantize, calibration_dir=None, samples=200):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize in ("dynamic", "int8", "float16"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == "int8":
+        if not calibration_dir:
+            raise SystemExit("❌ int8 quantization needs --calibration-dir with sample leaf images")
+        converter.representative_dataset = representative_dataset(calibration_dir, samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    with open(output, "wb") as f:
+        f.write(converter.convert())
+
+
+def export_onnx(model, output):
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=output)
+
+
+# Function to compare an exported backend with the original on a held-out folder
+def parity_check(reference, candidate, folder, batch_size=32):
+    agree = total = 0
+    deltas = []
+    images = load_images(folder)
+    while True:
+        batch = [image for _, image in itertools.islice(images, batch_size)]
+        if not batch:
+            break
+        batch = np.stack(batch)
+        expected, actual = reference.predict(batch), candidate.predict(batch)
+        top1 = np.argmax(expected, axis=1)
+        agree += int((top1 == np.argmax(actual, axis=1)).sum())
+        deltas.append(np.abs(expected[np.arange(len(top1)), top1] - actual[np.arange(len(top1)), top1]))
+        total += len(batch)
+    if not total:
+        raise SystemExit(f"❌ No readable images in {folder}")
+    deltas = np.concatenate(deltas) * 100
+    return {"images": total, "top1_agreement": agree / total,
+            "mean_confidence_delta": float(deltas.mean()), "max_confidence_delta": float(deltas.max())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the leaf disease model to TFLite or ONNX")
+    parser.add_argument("--model", default=artifact_path(DEFAULT_MODEL_PATH, "keras"), help="Source Keras .h5 model")
+    parser.add_argument("--format", choices=["tflite", "onnx"], default="tflite")
+    parser.add_argument("--quantize", choices=["none", "dynamic", "float16", "int8"], default="dynamic",
+                        help="TFLite quantization mode")
+    parser.add_argument("--calibration-dir", help="Sample leaf images for int8 calibration")
+    parser.add_argument("--samples", type=int, default=200, help="Calibration images to use")
+    parser.add_argument("--output", help="Artifact path (default: next to the model)")
+    parser.add_argument("--check-dir", help="Held-out images for the accuracy-parity check")
+    parser.add_argument("--min-agreement", type=float, default=0.99, help="Fail below this top-1 agreement")
+    args = parser.parse_args()
+
+    output = args.output or artifact_path(args.model, args.format)
+    reference = load_backend(args.model, "keras")
+    if args.format == "tflite":
+        export_tflite(reference.model, output, args.quantize, args.calibration_dir, args.samples)
+    else:
+        export_onnx(reference.model, output)
+    print(f"✅ Exported {output} ({os.path.getsize(output) / 1024 / 1024:.1f} MB, "
+          f"original {os.path.getsize(args.model) / 1024 / 1024:.1f} MB)")
+
+    if args.check_dir:
+        report = parity_check(reference, load_backend(output, args.format), args.check_dir)
+        print(f"Top-1 agreement: {report['top1_agreement']:.2%} over {report['images']} images, "
+              f"confidence delta mean {report['mean_confidence_delta']:.2f} / max {report['max_confidence_delta']:.2f} points")
+        if report["top1_agreement"] < args.min_agreement:
+            raise SystemExit(f"❌ Agreement below {args.min_agreement:.2%}, do not deploy this artifact")
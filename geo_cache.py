@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from upstream import CircuitOpenError, get_upstream
+
+# Persistent cache for Nominatim and Overpass results
+CACHE_PATH = os.environ.get("LEAF_GEO_CACHE_DB", "geo_cache.db")
+# Overpass results are shared by every lookup that falls in the same ~1 km tile
+TILE_DECIMALS = 2
+OVERPASS_TTL_SECONDS = 24 * 60 * 60
+MAX_GEOCODE_ENTRIES = 10000
+MAX_OVERPASS_ENTRIES = 5000
+
+OVERPASS_URL = os.environ.get("LEAF_OVERPASS_URL", "http://overpass-api.de/api/interpreter")
+# Nominatim host, e.g. a local mirror or a stand-in server for benchmarks ("127.0.0.1:8080" with scheme http)
+NOMINATIM_DOMAIN = os.environ.get("LEAF_NOMINATIM_DOMAIN", "nominatim.openstreetmap.org")
+NOMINATIM_SCHEME = os.environ.get("LEAF_NOMINATIM_SCHEME", "https")
+SEARCH_RADIUS_M = 10000
+SHOP_TAGS = ["agrarian", "farm", "fertilizer", "organics", "organic", "agricultural_supplies", "pesticides", "seeds"]
+
+
+# Function to build the Overpass query for agricultural shops around a point
+def build_overpass_query(latitude, longitude, radius=SEARCH_RADIUS_M):
+    clauses = "\n".join(
+        f'    node["shop"="{tag}"](around:{radius},{latitude},{longitude});' for tag in SHOP_TAGS)
+    return f"[out:json];\n(\n{clauses}\n);\nout body;"
+
+
+# Default geocoder: returns (latitude, longitude) or None, over the shared keep-alive Nominatim session
+def nominatim_geocode(location):
+    session = get_upstream("nominatim").session
+    response = session.get(f"{NOMINATIM_SCHEME}://{NOMINATIM_DOMAIN}/search",
+                           params={"q": location, "format": "json", "limit": 1}, timeout=10)
+    response.raise_for_status()
+    results = response.json()
+    if not results:
+        return None
+    return float(results[0]["lat"]), float(results[0]["lon"])
+
+
+# Default Overpass fetcher: returns the list of elements, raises on HTTP errors
+def overpass_fetch(latitude, longitude):
+    session = get_upstream("overpass").session
+    response = session.get(OVERPASS_URL, params={'data': build_overpass_query(latitude, longitude)}, timeout=30)
+    if response.status_code != 200:
+        raise OverpassError(response.status_code)
+    return response.json().get('elements', [])
+
+
+class OverpassError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"Overpass API error: {status_code}")
+        self.status_code = status_code
+
+
+def normalize_location(location):
+    return " ".join(location.lower().replace(",", " ").split())
+
+
+def tile_key(latitude, longitude):
+    return round(latitude, TILE_DECIMALS), round(longitude, TILE_DECIMALS)
+
+
+class GeoCache:
+    """SQLite-backed memo of geocoding by location string and Overpass results by lat/lon tile."""
+
+    def __init__(self, path=CACHE_PATH, geocode_fn=nominatim_geocode, overpass_fn=overpass_fetch,
+                 ttl=OVERPASS_TTL_SECONDS, max_geocode=MAX_GEOCODE_ENTRIES, max_overpass=MAX_OVERPASS_ENTRIES):
+        self.path = path
+        self.geocode_fn = geocode_fn
+        self.overpass_fn = overpass_fn
+        self.ttl = ttl
+        self.max_geocode = max_geocode
+        self.max_overpass = max_overpass
+        self.counters = {"geocode_hits": 0, "geocode_misses": 0, "overpass_hits": 0, "overpass_misses": 0,
+                         "overpass_stale": 0}
+        self._lock = threading.Lock()
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode (
+                location TEXT PRIMARY KEY,
+                latitude REAL,
+                longitude REAL,
+                last_used REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS overpass (
+                tile_lat REAL NOT NULL,
+                tile_lon REAL NOT NULL,
+                elements TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (tile_lat, tile_lon)
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    # Function to geocode a location, remembering misses too so typos don't hit Nominatim again
+    def geocode(self, location):
+        key = normalize_location(location)
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT latitude, longitude FROM geocode WHERE location = ?", (key,)).fetchone()
+            if row is not None:
+                self._count("geocode_hits")
+                conn.execute("UPDATE geocode SET last_used = ? WHERE location = ?", (time.time(), key))
+                conn.commit()
+                return None if row[0] is None else (row[0], row[1])
+
+            self._count("geocode_misses")
+            # Sessions searching the same place at the same moment share one Nominatim request
+            result = get_upstream("nominatim").call(("geocode", key), lambda: self.geocode_fn(location))
+            latitude, longitude = result if result else (None, None)
+            conn.execute("INSERT OR REPLACE INTO geocode (location, latitude, longitude, last_used) VALUES (?, ?, ?, ?)",
+                         (key, latitude, longitude, time.time()))
+            self._evict(conn, "geocode", self.max_geocode)
+            conn.commit()
+            return result
+        finally:
+            conn.close()
+
+    # Function to get the Overpass elements for the tile containing a point
+    def shops_near(self, latitude, longitude):
+        tile_lat, tile_lon = tile_key(latitude, longitude)
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT elements, fetched_at FROM overpass WHERE tile_lat = ? AND tile_lon = ?",
+                               (tile_lat, tile_lon)).fetchone()
+            if row is not None and now - row[1] < self.ttl:
+                self._count("overpass_hits")
+                conn.execute("UPDATE overpass SET last_used = ? WHERE tile_lat = ? AND tile_lon = ?",
+                             (now, tile_lat, tile_lon))
+                conn.commit()
+                return json.loads(row[0])
+
+            self._count("overpass_misses")
+            # Query the tile centre so every lookup in the tile gets the same shop set, and lookups of
+            # the same tile that arrive while the query runs wait for it instead of sending their own
+            try:
+                elements = get_upstream("overpass").call(("overpass", tile_lat, tile_lon),
+                                                         lambda: self.overpass_fn(tile_lat, tile_lon))
+            except (CircuitOpenError, OverpassError, OSError):
+                if row is None:
+                    raise
+                # Overpass is down or slow: an expired result for this tile beats no result
+                self._count("overpass_stale")
+                return json.loads(row[0])
+            conn.execute("INSERT OR REPLACE INTO overpass (tile_lat, tile_lon, elements, fetched_at, last_used) "
+                         "VALUES (?, ?, ?, ?, ?)", (tile_lat, tile_lon, json.dumps(elements), now, now))
+            self._evict(conn, "overpass", self.max_overpass)
+            conn.commit()
+            return elements
+        finally:
+            conn.close()
+
+    # Function to drop the least recently used rows once a table is over its size limit
+    @staticmethod
+    def _evict(conn, table, max_entries):
+        conn.execute(f"""
+            DELETE FROM {table} WHERE rowid IN (
+                SELECT rowid FROM {table} ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (max_entries,))
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+_geo_cache = None
+_geo_cache_lock = threading.Lock()
+
+
+# Function to get the process-wide cache, creating geo_cache.db on first use rather than at import
+def get_geo_cache():
+    global _geo_cache
+    if _geo_cache is None:
+        with _geo_cache_lock:
+            if _geo_cache is None:
+                _geo_cache = GeoCache()
+    return _geo_cache
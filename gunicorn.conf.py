@@ -0,0 +1,61 @@
+# Pre-fork production settings for the inference API: gunicorn -c gunicorn.conf.py serve:app
+import multiprocessing
+import os
+import secrets
+
+cpus = multiprocessing.cpu_count()
+
+bind = os.environ.get("LEAF_API_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("LEAF_API_WORKERS", cpus))
+# A few threads per worker so concurrent requests can meet in the micro-batcher
+worker_class = "gthread"
+threads = int(os.environ.get("LEAF_API_THREADS", "8"))
+# A worker never runs more than `threads` requests at once (the rest wait in its queue), so the API's
+# in-flight limit has to be below it: the threads above the limit answer 503 straight away when the
+# worker is saturated, instead of clients queueing until they time out
+os.environ.setdefault("LEAF_API_MAX_INFLIGHT", str(max(1, threads // 2)))
+# Split the cores between workers so they don't all spin up a thread per core for each predict.
+# This has to be set before the app (and the model) is imported, which preload does in the master.
+intra_op_threads = str(max(1, cpus // workers))
+os.environ.setdefault("LEAF_INTRA_OP_THREADS", intra_op_threads)
+os.environ.setdefault("OMP_NUM_THREADS", intra_op_threads)
+os.environ.setdefault("TF_NUM_INTRAOP_THREADS", intra_op_threads)
+os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+
+# Runtimes that can be loaded in the master and used after fork. TensorFlow can't: its thread pools
+# don't survive fork, so with the keras backend each worker imports the app and loads its own model.
+# ONNX Runtime (and TFLite's XNNPACK delegate) start an intra-op thread pool when the model is loaded,
+# so these are only shared when each worker runs them on one thread (the default, one worker per core).
+FORK_SAFE_BACKENDS = ("tflite", "onnx")
+backend = os.environ.get("LEAF_MODEL_BACKEND", "keras")
+fork_safe = backend in FORK_SAFE_BACKENDS and os.environ["LEAF_INTRA_OP_THREADS"] == "1"
+# Load the model once in the master before forking so workers share the weights copy-on-write
+preload_app = os.environ.get("LEAF_API_PRELOAD", "1" if fork_safe else "0") == "1"
+timeout = int(os.environ.get("LEAF_API_WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+# Pending connections the kernel may hold before refusing new ones
+backlog = int(os.environ.get("LEAF_API_BACKLOG", "256"))
+
+# Every worker must sign API tokens with the same key, also when each one imports the app itself
+os.environ.setdefault("LEAF_API_SECRET", secrets.token_hex(32))
+
+
+# Master, after preload_app imported the app and before forking: load the model to share it
+def when_ready(server):
+    if int(os.environ["LEAF_API_MAX_INFLIGHT"]) >= threads:
+        server.log.warning("LEAF_API_MAX_INFLIGHT >= threads: overloaded workers will queue requests, not reject them")
+    if server.cfg.preload_app:
+        import serve
+
+        serve.make_api.leaf_deases_model()
+        server.log.info("Model loaded in the master (%s backend)", backend)
+
+
+# Worker, after importing the app: without preload, load the model in the background
+# (the worker answers /healthz meanwhile, /readyz turns 200 once the model is in)
+def post_worker_init(worker):
+    import serve
+
+    serve.make_api.start_loading_model()
+    worker.log.info("Worker %s started (%s intra-op threads)", worker.pid, os.environ["LEAF_INTRA_OP_THREADS"])
@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+
+# Which runtime serves the model: keras (original .h5), tflite or onnx (see export_model.py)
+MODEL_BACKEND = os.environ.get("LEAF_MODEL_BACKEND", "keras")
+# Threads each backend may use for one predict call (0 lets the runtime decide)
+INTRA_OP_THREADS = int(os.environ.get("LEAF_INTRA_OP_THREADS", "0"))
+
+ARTIFACT_EXTENSIONS = {"keras": ".h5", "tflite": ".tflite", "onnx": ".onnx"}
+
+
+# Function to pick the backend from a model file's extension
+def backend_for(path):
+    ext = os.path.splitext(path)[1].lower()
+    for name, artifact_ext in ARTIFACT_EXTENSIONS.items():
+        if ext == artifact_ext:
+            return name
+    return "keras"
+
+
+# Function to map the .h5 path to the exported artifact of another backend (same folder, same name)
+def artifact_path(path, backend=MODEL_BACKEND):
+    if backend_for(path) == backend:
+        return path
+    return os.path.splitext(path)[0] + ARTIFACT_EXTENSIONS[backend]
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, path):
+        import keras
+
+        if INTRA_OP_THREADS:
+            import tensorflow as tf
+            try:
+                tf.config.threading.set_intra_op_parallelism_threads(INTRA_OP_THREADS)
+            except RuntimeError:
+                pass  # TensorFlow was already initialised by someone else, keep its setting
+        self.model = keras.models.load_model(path, compile=False)
+        self.model.trainable = False
+
+    def predict(self, batch):
+        return self.model.predict(batch, verbose=0)
+
+    def weight_bytes(self):
+        return sum(w.nbytes for w in self.model.get_weights())
+
+
+class TFLiteBackend:
+    name = "tflite"
+
+    def __init__(self, path):
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                from tensorflow.lite import Interpreter
+
+        self.path = path
+        self.interpreter = Interpreter(model_path=path, num_threads=INTRA_OP_THREADS or None)
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self._batch_size = None
+
+    def predict(self, batch):
+        batch = np.asarray(batch)
+        if batch.shape[0] != self._batch_size:
+            self.interpreter.resize_tensor_input(self.input["index"], list(batch.shape))
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch.shape[0]
+
+        # Fully quantized (int8) models take and return integers, convert with the stored scale/zero point
+        scale, zero_point = self.input["quantization"]
+        if self.input["dtype"] in (np.int8, np.uint8) and scale:
+            info = np.iinfo(self.input["dtype"])
+            batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max)
+        self.interpreter.set_tensor(self.input["index"], batch.astype(self.input["dtype"]))
+        self.interpreter.invoke()
+
+        output = self.interpreter.get_tensor(self.output["index"])
+        scale, zero_point = self.output["quantization"]
+        if self.output["dtype"] in (np.int8, np.uint8) and scale:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+    def weight_bytes(self):
+        return os.path.getsize(self.path)
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, path):
+        import onnxruntime as ort
+
+        self.path = path
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = INTRA_OP_THREADS
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        return self.session.run(None, {self.input_name: np.asarray(batch, dtype=np.float32)})[0]
+
+    def weight_bytes(self):
+        return os.path.getsize(self.path)
+
+
+BACKENDS = {"keras": KerasBackend, "tflite": TFLiteBackend, "onnx": OnnxBackend}
+
+
+def load_backend(path, backend=None):
+    return BACKENDS[backend or backend_for(path)](path)
@@ -1,33 +1,21 @@
 import streamlit as st
 import sqlite3
+import auth
+import metrics
 
-# Function to create a database connection
-def get_db_connection():
-    conn = sqlite3.connect("users.db")
-    return conn
-
-# Function to check user credentials
+# Function to check user credentials (bcrypt hash comparison, see auth.py)
+@metrics.timed("db.check_login")
 def check_login(username, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = ? AND password = ?", (username, password))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    return auth.authenticate(username, password)
 
 # Function to register a new user
+@metrics.timed("db.register_user")
 def register_user(username, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     try:
-        cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
-        conn.commit()
+        auth.create_user(username, password)
         st.success("✅ Registration successful! You can now log in.")
     except sqlite3.IntegrityError:
         st.error("❌ Username already exists! Try another.")
-    finally:
-        conn.close()
 
 # Streamlit Login Page
 def login():
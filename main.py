@@ -1,15 +1,29 @@
 # main.py
+# Heavy dependencies (keras/tensorflow, cv2, folium) are imported inside the page that needs them,
+# so the login page, Chat and the Dose Calculator start without them.
 import streamlit as st
-import cv2 as cv
 import numpy as np
-import keras
-import requests
-from geopy.geocoders import Nominatim
-import folium
-from streamlit_folium import folium_static
 from login import login
 from chat import chat
-from deep_translator import GoogleTranslator
+from translation import get_translation_cache, UI_STRINGS
+from geo_cache import get_geo_cache, OverpassError
+from upstream import CircuitOpenError, upstream_stats
+from disease_data import fertilizer_data
+from treatment_catalogue import lookup as lookup_treatment, localized as localized_treatment
+from model_registry import registry_stats, warm_up
+from prediction_cache import prediction_cache, model_identity
+from prediction_log import get_prediction_log
+from batching import batcher_stats
+from broker import broker
+import metrics
+
+# Numbers owned by the shared caches and queues, shown in the diagnostics panel
+metrics.register_collector("prediction_cache", prediction_cache.stats)
+metrics.register_collector("translation_cache", lambda: get_translation_cache().stats())
+metrics.register_collector("geo_cache", lambda: get_geo_cache().stats())
+metrics.register_collector("chat_broker", broker.stats)
+metrics.register_collector("upstreams", upstream_stats)
+metrics.register_collector("prediction_log", lambda: get_prediction_log().stats())
 
 # Set page configuration
 st.set_page_config(page_title="Plant Disease & Fertilizer Finder", layout="wide")
@@ -20,254 +34,138 @@ if "logged_in" not in st.session_state:
 
 # ✅ Only show the login page if the user is NOT logged in
 
+@metrics.timed("translate")
 def translate_text(text):
-    if st.session_state["language"] == "en":
-        return text  # No translation needed for English
-    return GoogleTranslator(source="auto", target=st.session_state["language"]).translate(text)
+    # Served from the shared translation cache, only misses go to the translator
+    return get_translation_cache().translate(text, st.session_state["language"])
 languages = {"English": "en", "తెలుగు (Telugu)": "te", "हिंदी (Hindi)": "hi"}
 selected_language = st.sidebar.selectbox("🌍 Select Language", list(languages.keys()))
 st.session_state["language"] = languages[selected_language]
+# Translate all static UI strings in one batch instead of one request per label
+get_translation_cache().translate_many(UI_STRINGS, st.session_state["language"])
 if not st.session_state["logged_in"]:
     login()
     st.stop()
-st.write(translate_text(f"👋 Welcome, **{st.session_state['username']}**!"))
-# Load the model with error handling
-try:
-    model = keras.models.load_model('Training/model/Leaf Deases(96,88).h5')
-except Exception as e:
-    st.error(f"Error loading model: {str(e)}")
-    st.stop()
+st.write(f"👋 {translate_text('Welcome')}, **{st.session_state['username']}**!")
+# Start loading the model in the background so the first prediction doesn't wait for it
+warm_up()
 
-# Define the labels for the diseases
-fertilizer_data = {
-    "apple": {
-        "Fungicide": {"Captan": 2.268, "Mancozeb": 2.722, "Myclobutanil": 0.1134},
-        "Insecticide": {"Imidacloprid": 0.1134, "Esfenvalerate": 0.2835},
-    },
-    "corn": {
-        "Fungicide": {"Azoxystrobin": 0.4395, "Propiconazole": 0.1701, "Mancozeb": 1.361},
-        "Insecticide": {"Chlorpyrifos": 0.946, "Lambda-cyhalothrin": 0.109},
-    },
-    "cherries": {
-        "Fungicide": {"Captan": 2.268, "Chlorothalonil": 2.126, "Sulfur": 9.072},
-        "Insecticide": {"Spinosad": 0.2835, "Malathion": 1.138},
-    },
-    "grapes": {
-        "Fungicide": {"Mancozeb": 1.361, "Sulfur": 4.536, "Captan": 1.814},
-        "Insecticide": {"Imidacloprid": 0.0567, "Bifenthrin": 0.1814},
-    },
-    "peaches": {
-        "Fungicide": {"Chlorothalonil": 2.126, "Captan": 2.268, "Sulfur": 9.072},
-        "Insecticide": {"Esfenvalerate": 0.2835, "Malathion": 1.183},
-    },
-    "tomato": {
-        "Fungicide": {"Chlorothalonil": 0.946, "Mancozeb": 1.361},
-        "Insecticide": {"Spinosad": 0.2835, "Permethrin": 0.2268},
-    },
-    "pepper": {
-        "Fungicide": {"Mancozeb": 1.361, "Chlorothalonil": 0.946},
-        "Insecticide": {"Imidacloprid": 0.0567, "Spinosad": 0.2835},
-    },
-    "potato": {
-        "Fungicide": {"Mancozeb": 0.907, "Chlorothalonil": 0.946},
-        "Insecticide": {"Imidacloprid": 0.0567, "Spinosad": 0.2835},
-    }
-}
-
-label_name = [
-    'Apple scab', 'Apple Black rot', 'Apple Cedar apple rust', 'Apple healthy',
-    'Cherry Powdery mildew', 'Cherry healthy', 'Corn Cercospora leaf spot Gray leaf spot',
-    'Corn Common rust', 'Corn Northern Leaf Blight', 'Corn healthy', 'Grape Black rot',
-    'Grape Esca', 'Grape Leaf blight', 'Grape healthy', 'Peach Bacterial spot',
-    'Peach healthy', 'Pepper bell Bacterial spot', 'Pepper bell healthy',
-    'Potato Early blight', 'Potato Late blight', 'Potato healthy',
-    'Strawberry Leaf scorch', 'Strawberry healthy', 'Tomato Bacterial spot',
-    'Tomato Early blight', 'Tomato Late blight', 'Tomato Leaf Mold',
-    'Tomato Septoria leaf spot', 'Tomato Spider mites', 'Tomato Target Spot',
-    'Tomato Yellow Leaf Curl Virus', 'Tomato mosaic virus', 'Tomato healthy'
-]
 def find_nearest_fertilizer_shops(location):
-        geolocator = Nominatim(user_agent="fertilizer-finder", timeout=10)
-
         try:
-            geocode = geolocator.geocode(location)
+            # Geocoding and Overpass results are cached (by location string and lat/lon tile)
+            with metrics.stage_timer("shops.geocode"):
+                geocode = get_geo_cache().geocode(location)
             if not geocode:
                 return None, "❌ Location not found. Please enter a valid location."
 
-            latitude, longitude = geocode.latitude, geocode.longitude
+            latitude, longitude = geocode
             st.session_state["latitude"] = latitude
             st.session_state["longitude"] = longitude
 
-            # Overpass API for querying nearby fertilizer shops
-            overpass_url = "http://overpass-api.de/api/interpreter"
-            overpass_query = f"""
-                            [out:json];
-                            (
-                                node["shop"="agrarian"](around:10000,{latitude},{longitude});
-                                node["shop"="farm"](around:10000,{latitude},{longitude});
-                                
-                                node["shop"="fertilizer"](around:10000,{latitude},{longitude});
-                                node["shop"="organics"](around:10000,{latitude},{longitude});
-                                node["shop"="organic"](around:10000,{latitude},{longitude});
-                                node["shop"="agricultural_supplies"](around:10000,{latitude},{longitude});
-                                node["shop"="pesticides"](around:10000,{latitude},{longitude});
-                                node["shop"="seeds"](around:10000,{latitude},{longitude});
-                            );
-                            out body;
-                            """
-
-            response = requests.get(overpass_url, params={'data': overpass_query}, timeout=30)
-
-            if response.status_code == 200:
-                data = response.json()
-
-                if 'elements' in data and data['elements']:
-                    results = [
-                        {
-                            "name": elem.get("tags", {}).get("name", "Unknown"),
-                            "latitude": elem["lat"],
-                            "longitude": elem["lon"],
-                            "address": elem.get("tags", {}).get("addr:full", "Address not available"),
-                        }
-                        for elem in data['elements']
-                    ]
+            from shop_index import get_index as get_shop_index
+
+            # Answer from the local shop index when one has been built, Overpass is only a fallback
+            index = get_shop_index()
+            if index is not None and len(index):
+                with metrics.stage_timer("shops.local_index"):
+                    results = index.within(latitude, longitude)
+                if results:
                     return results, None
-                else:
-                    return None, "⚠ No nearby fertilizer shops found."
+
+            with metrics.stage_timer("shops.overpass"):
+                elements = get_geo_cache().shops_near(latitude, longitude)
+
+            if elements:
+                results = [
+                    {
+                        "name": elem.get("tags", {}).get("name", "Unknown"),
+                        "latitude": elem["lat"],
+                        "longitude": elem["lon"],
+                        "address": elem.get("tags", {}).get("addr:full", "Address not available"),
+                    }
+                    for elem in elements
+                ]
+                return results, None
             else:
-                return None, f"🚨 Overpass API error: {response.status_code}"
+                return None, "⚠ No nearby fertilizer shops found."
 
+        except OverpassError as e:
+            return None, f"🚨 Overpass API error: {e.status_code}"
+        except CircuitOpenError as e:
+            return None, f"⚠ Shop search is temporarily unavailable, please try again in {e.retry_in:.0f} seconds."
         except Exception as e:
             return None, f"⚠ Error occurred: {str(e)}"
 
-disease_treatments = {'Tomato Bacterial Spot':{'Pesticides-Actigard 50WGb alternated with copper + Mancozeb.Management Practices-Avoid sprinkler irrigation, maintain proper distance from cull piles near greenhouses or fields, and implement crop rotation with nonhost crops. Apply bactericides at intervals of 7 to 10 days, with shorter intervals recommended in conditions of rain, high humidity, and warm temperatures.'},
-
-'Tomato Early Blight':{'Fungicide-GardenTech brand Daconil fungicides.Cultural Practices- Apply mulch, such as fabric, straw, plastic, or dried leaves, to cover the soil around plants. Employ drip irrigation to water at the base of the plants, and remove infected leaves promptly, ensuring they are either buried or burned to prevent further spread.'},
- 
-'Tomato late blight' :{'Fungicide - Ridomil Gold (Metalaxyl 4% + Mancozeb 64%).Management Practices: Preventative fungicide sprays may be warranted if late blight is present in the surrounding area. Infected plants should be removed, destroyed, and properly disposed of to curb disease transmission.'},
-
- 'Tomato Leaf Mold': {'Fungicide: GSC Organic Tomato Fertilizer.Cultural Practices: Maintain relative humidity below 85PERCENTAGE and ensure night temperatures exceed outdoor temperatures, particularly in greenhouses. Utilize drip irrigation, avoid wetting the foliage, and prune or stake the plants to promote upright growth and improve airflow around the plants.'}, 
-
-'Tomato Septoria Leaf Spot': {'Fungicide: Organocide Plant Doctor Systemic Fungicide. Cultural Practices: Remove diseased leaves and improve air circulation around the plants. Apply mulch around the base of the plants, avoid overhead watering, and control weed growth. Crop rotation is also recommended to reduce the incidence of the disease.'}, 
-
-'Tomato Spider Mites':{ 'Treatment: Prepare a chilli solution by mixing 20g of pounded chilli with 1 liter of water, allowing it to sit for one day, then dilute with 5 liters of water. Apply the solution weekly to control newly hatched mites. Alternatively, use a hard stream of water to dislodge the mites or apply insecticidal soaps, horticultural oils, or neem oil.'}, 
-
-'Tomato Target Spot': {'Fungicides: Chlorothalonil, copper oxychloride, or mancozeb. Management Practices: Begin treatment at the first sign of lesions and continue applications at intervals of 10 to 14 days, ceasing 3 to 4 weeks before the final harvest.', 'Tomato Yellow Leaf Curl Virus:' 'Management Practices: Infected plants should be covered with a clear or black plastic bag tied at the stem. Cut the plant below the bag and allow it to desiccate for 1 to 2 days before disposal. No treatments exist for the virus itself; therefore, controlling whitefly populations is crucial to prevent the spread of infection.'},
-
-'Tomato Mosaic Virus': {'Management Practices: Promptly remove infected plants, as they act as a source of infection for healthy plants nearby. After handling infected plants, wash hands and tools with hot, soapy water. Sterilize tools using a disinfectant such as Virkon S to minimize cross-contamination. Additionally, avoid planting other susceptible species in proximity to infected plants.'},
-
-'Blackrot': {'Black rot thrives in humid climates, with berries remaining highly susceptible for 3-5 weeks after cap fall and becoming immune after 2 more weeks. The primary infection source is mummified berries from the previous season, making vineyard sanitation crucial for prevention. The disease spreads from leaves to fruit, potentially causing complete crop loss in severe cases. Effective control includes fungicides like mancozeb and ziram, while DMIs and strobilurins (e.g., Abound, Aprovia Top, Pristine, Quadris Top) provide strong protection.'},
- 
-'grape esca':{'Esca disease is caused by fungi like Phaeomoniella chlamydospora and Phaeoacremonium minimum, which enter through wounds and spread via the vines vascular system.Common symptoms include yellowing or reddening of leaves, necrotic shoots, and cankers on vine wood. Early detection is crucial to prevent severe damage.Sterilizing pruning tools with disinfectants helps reduce the spread of infection between plants.Fungicide and bactericide treatments can help control the disease, and selecting resistant grape varieties offers long-term protection.Maintaining well-drained soil and proper root management prevents water stagnation and enhances vine health.'},
-
-'grape leaf blight':{'Bacterial blight of grapevine, caused by Xanthomonas ampelina, spreads through pruning tools and enters healthy tissues via wounds, especially in wet conditions. Early symptoms include reddish-brown streaks, cankers, and shoot dieback. Severely infected vines appear stunted, with dead leaves and blackened flowers. Infected roots result in poor shoot growth, affecting vine health.The disease can cause serious harvest losses, requiring laboratory confirmation for accurate diagnosis.Preventive measures include sterilizing tools, sourcing healthy plants, regular vineyard monitoring, and enforcing hygiene protocols.Following biosecurity practices, such as “Come clean, Go clean,” helps prevent the spread of bacterial blight.'},
-
- 'Peach Bacterial Spot':{ 'Peach bacterial spot caused by Xanthomonas arboricola pv. pruni, affects leaves, fruit, and twigs, leading to dark water-soaked lesions, yellowing, and premature leaf drop. Severe infections reduce fruit quality and yield.The disease spreads through wind, rain, and infected plant material, thriving in warm, humid conditions. Symptoms include small dark spots on fruit that enlarge and crack, causing blemishes.To prevent bacterial spot, use resistant peach varieties and certified disease-free plants. Maintain proper pruning and airflow to reduce moisture buildup.Apply copper-based bactericides or antibiotics as preventive measures during the growing season. Avoid excessive nitrogen fertilization, which makes trees more vulnerable.Follow biosecurity measures like cleaning tools, removing infected plant material, and regular orchard monitoring to prevent the spread of the disease.'},
-
-'Pepper Bell Bacterial Spot': {'Cause: Xanthomonas campestris pv. vesicatoria spreads through contaminated seeds, plant debris, wind, and rain.Symptoms: Dark, water-soaked lesions on leaves, stems, and fruits, leading to defoliation and reduced yield.Prevention: Use disease-free seeds, apply copper-based bactericides, ensure good air circulation, and avoid overhead watering.'},
-
-'Potato Early Blight':{'Cause: Alternaria solani, a fungal pathogen, thrives in warm, humid conditions and spreads via wind, water, and infected debris. Symptoms: Brown concentric-ring lesions on leaves, progressing to yellowing and defoliation, reducing tuber size. Prevention: Rotate crops, apply fungicides, remove infected plant debris, and ensure proper plant nutrition to enhance resistance.'},
-
-'Potato Late Blight':{'Cause: Phytophthora infestans, a water mold, spreads via rain, wind, and contaminated soil or tools, Symptoms: Dark, water-soaked spots on leaves, white mold under humid conditions, and rapid plant decay.Prevention: Use resistant varieties, apply fungicides, avoid excess moisture, and remove infected plants immediately.'},
-
-'Strawberry Leaf Scorch':{'Cause: Diplocarpon earlianum, a fungal pathogen, spreads in wet, humid conditions through rain splash and infected debris.Symptoms: Purple-brown leaf spots that expand, causing scorched, dried leaves, weakening plant vigor.Prevention: Improve air circulation, prune excess growth, apply fungicides, and remove infected leaves to prevent spread.'},
-
-'Apple Scab':{'Cause:Apple scab is caused by the fungal pathogen Venturia inaequalis. It thrives in wet and humid conditions, leading to dark, scaly lesions on leaves and fruit. Treatment:Use fungicides such as fixed copper, Bordeaux mixtures, copper soaps (copper octanoate), sulfur, mineral or neem oils, and myclobutanil.Myclobutanil is a synthetic fungicide, while the others are considered organically acceptable.Apply copper- or sulfur-based protectant sprays to prevent the disease.'},
-
-'Apple Black Rot': {'Cause:Apple black rot is caused by the fungus Diplodia seriata. The disease is promoted by warm temperatures, frequent rain, and prolonged wet conditions, which facilitate fruit infection.Treatment:Apply copper-based products, lime-sulfur, Daconil, Ziram, or Mancozeb as fungicidal treatments.Remove mummified fruit (shriveled and dried fruit) attached to the tree to prevent further spread.'},
-
-'Cedar Apple Rust': {'Cause:Cedar apple rust is caused by multiple fungal species from the genus Gymnosporangium. This disease requires both apple and juniper trees for its life cycle, making proximity a key factor in its spread. Treatment: Use fungicides containing myclobutanil, which are the most effective in preventing rust.Copper and sulfur-based products can also be applied.Maintain a minimum distance of one mile between apple and juniper trees to reduce infection risk.'},
-
-'Cherry Powdery Mildew':{'Cause:Cherry powdery mildew is caused by the fungus Podosphaera clandestina. It thrives in warm, humid conditions with low rainfall. Treatment:Apply fungicides soon after petal fall and repeat 2 to 3 weeks later if necessary.Recommended fungicides include:Bonide Sulfur Plant Fungicide, Hi-Yield Snake Eyes Dusting Wettable SulfurMonterey Horticultural Oil,Spectracide IMMUNOX Multi-Purpose Fungicide Spray Concentrate,Tebucon 45 DF, Tesaris, Topguard SC, Topguard EQ, Topsin 4.5 FL, Torino'},
-
-'Cercospora Leaf Spot':{'Cause:Cercospora leaf spot is caused by multiple species of Cercospora fungi. The disease spreads via airborne conidia (fungal spores transported through the air).Treatment:Apply fungicides, including:Mancozeb (400 g/acre),Copper oxychloride (500 g/acre),Carbendazim (200 g/acre),Propiconazole (200 ml/acre),Metiram (200 g/acre),Kresoxim-methyl (200 ml/acre),SYSTHANE (contains myclobutanil),HERITAGE (contains azoxystrobin),Remove infected plant material to prevent further spread.'},
-
-'Corn Common Rust':{'Cause:Common rust in corn is caused by the fungus Puccinia sorghi.Treatment:Use fungicides such as:Chlorothalonil,Mancozeb,Kresoxim-methyl,Tebuconazole,Pyraclostrobin,Azoxystrobin,Plant corn hybrids with genetic resistance to the disease.'},
-
-'Corn Northern Leaf Blight':{ 'Cause: Northern leaf blight in corn is caused by the fungus Exserohilum turcicum.Treatment:Apply appropriate fungicides to control the infection.Use endophytic Trichoderma as a biological control agent to suppress the disease. CREATE  A DICTIONARY WHERE THE DIESASE NAMES ARE KEYS AND THE TREATMENT ,CAUSE,PESTICIDES ALL COME UNDER VALUE'},
-
-'Tomato Bacterial Spot' :{'Pesticides-Actigard 50WGb alternated with copper + Mancozeb.Management Practices-Avoid sprinkler irrigation, maintain proper distance from cull piles near greenhouses or fields, and implement crop rotation with nonhost crops. Apply bactericides at intervals of 7 to 10 days, with shorter intervals recommended in conditions of rain, high humidity, and warm temperatures.'},
-
-'Tomato Early Blight':{'Fungicide-GardenTech brand Daconil fungicides.Cultural Practices- Apply mulch, such as fabric, straw, plastic, or dried leaves, to cover the soil around plants. Employ drip irrigation to water at the base of the plants, and remove infected leaves promptly, ensuring they are either buried or burned to prevent further spread.'},
-
-'Tomato late blight':{' Fungicide - Ridomil Gold (Metalaxyl 4% + Mancozeb 64%).Management Practices: Preventative fungicide sprays may be warranted if late blight is present in the surrounding area. Infected plants should be removed, destroyed, and properly disposed of to curb disease transmission.'},
-
-'Tomato Leaf Mold':{'Fungicide: GSC Organic Tomato Fertilizer.Cultural Practices: Maintain relative humidity below 85% and ensure night temperatures exceed outdoor temperatures, particularly in greenhouses. Utilize drip irrigation, avoid wetting the foliage, and prune or stake the plants to promote upright growth and improve airflow around the plants.'},
-
-'Tomato Septoria Leaf Spot':{'Fungicide: Organocide Plant Doctor Systemic Fungicide.Cultural Practices: Remove diseased leaves and improve air circulation around the plants. Apply mulch around the base of the plants, avoid overhead watering, and control weed growth. Crop rotation is also recommended to reduce the incidence of the disease.'},
-
-'Tomato Spider Mites' :{'Treatment: Prepare a chilli solution by mixing 20g of pounded chilli with 1 liter of water, allowing it to sit for one day, then dilute with 5 liters of water. Apply the solution weekly to control newly hatched mites. Alternatively, use a hard stream of water to dislodge the mites or apply insecticidal soaps, horticultural oils, or neem oil.'},
-
-'Tomato Target Spot':{'Fungicides: Chlorothalonil, copper oxychloride, or mancozeb.Management Practices: Begin treatment at the first sign of lesions and continue applications at intervals of 10 to 14 days, ceasing 3 to 4 weeks before the final harvest.'},
-
-'Tomato Yellow Leaf Curl Virus':{'Management Practices: Infected plants should be covered with a clear or black plastic bag tied at the stem. Cut the plant below the bag and allow it to desiccate for 1 to 2 days before disposal. No treatments exist for the virus itself; therefore, controlling whitefly populations is crucial to prevent the spread of infection.'},
-
-'Tomato Mosaic Virus': {'Management Practices: Promptly remove infected plants, as they act as a source of infection for healthy plants nearby. After handling infected plants, wash hands and tools with hot, soapy water. Sterilize tools using a disinfectant such as Virkon S to minimize cross-contamination. Additionally, avoid planting other susceptible species in proximity to infected plants.'},
-
-'Blackrot':{'Black rot thrives in humid climates, with berries remaining highly susceptible for 3-5 weeks after cap fall and becoming immune after 2 more weeks. The primary infection source is mummified berries from the previous season, making vineyard sanitation crucial for prevention. The disease spreads from leaves to fruit, potentially causing complete crop loss in severe cases. Effective control includes fungicides like mancozeb and ziram, while DMIs and strobilurins (e.g., Abound, Aprovia Top, Pristine, Quadris Top) provide strong protection.'},
-
-'Grape Esca':{'Esca disease is caused by fungi like Phaeomoniella chlamydospora and Phaeoacremonium minimum, which enter through wounds and spread via the vines vascular system.Common symptoms include yellowing or reddening of leaves, necrotic shoots, and cankers on vine wood. Early detection is crucial to prevent severe damage.Sterilizing pruning tools with disinfectants helps reduce the spread of infection between plants.Fungicide and bactericide treatments can help control the disease, and selecting resistant grape varieties offers long-term protection.Maintaining well-drained soil and proper root management prevents water stagnation and enhances vine health.'},
-
-'Grape Leaf Blight':{'Bacterial blight of grapevine, caused by Xanthomonas ampelina, spreads through pruning tools and enters healthy tissues via wounds, especially in wet conditions. Early symptoms include reddish-brown streaks, cankers, and shoot dieback.Severely infected vines appear stunted, with dead leaves and blackened flowers. Infected roots result in poor shoot growth, affecting vine health.The disease can cause serious harvest losses, requiring laboratory confirmation for accurate diagnosis.Preventive measures include sterilizing tools, sourcing healthy plants, regular vineyard monitoring, and enforcing hygiene protocols.Following biosecurity practices, such as “Come clean, Go clean,” helps prevent the spread of bacterial blight.'},
-
-'Peach Bacteria':{'Peach bacterial spot caused by Xanthomonas arboricola pv. pruni, affects leaves, fruit, and twigs, leading to dark water-soaked lesions, yellowing, and premature leaf drop. Severe infections reduce fruit quality and yield.The disease spreads through wind, rain, and infected plant material, thriving in warm, humid conditions. Symptoms include small dark spots on fruit that enlarge and crack, causing blemishes.To prevent bacterial spot, use resistant peach varieties and certified disease-free plants. Maintain proper pruning and airflow to reduce moisture buildup.Apply copper-based bactericides or antibiotics as preventive measures during the growing season. Avoid excessive nitrogen fertilization, which makes trees more vulnerable. Follow biosecurity measures like cleaning tools, removing infected plant material, and regular orchard monitoring to prevent the spread of the disease.'},
-
-'Pepper Bell Bacterial Spot':{'Cause: Xanthomonas campestris pv. vesicatoria spreads through contaminated seeds, plant debris, wind, and rain.Symptoms: Dark, water-soaked lesions on leaves, stems, and fruits, leading to defoliation and reduced yield.Prevention: Use disease-free seeds, apply copper-based bactericides, ensure good air circulation, and avoid overhead watering.'},
-
-'Potato Early Blight':{'Cause: Alternaria solani, a fungal pathogen, thrives in warm, humid conditions and spreads via wind, water, and infected debris.Symptoms: Brown concentric-ring lesions on leaves, progressing to yellowing and defoliation, reducing tuber size.Prevention: Rotate crops, apply fungicides, remove infected plant debris, and ensure proper plant nutrition to enhance resistance.'},
-
-'Potato Late Blight':{'Cause: Phytophthora infestans, a water mold, spreads via rain, wind, and contaminated soil or tools Symptoms: Dark, water-soaked spots on leaves, white mold under humid conditions, and rapid plant decay.Prevention: Use resistant varieties, apply fungicides, avoid excess moisture, and remove infected plants immediately.'},
-
-'Strawberry Leaf Scorch':{'Cause: Diplocarpon earlianum, a fungal pathogen, spreads in wet, humid conditions through rain splash and infected debris.Symptoms: Purple-brown leaf spots that expand, causing scorched, dried leaves, weakening plant vigor.Prevention: Improve air circulation, prune excess growth, apply fungicides, and remove infected leaves to prevent spread.'},
-
-'Apple Scab':{'Cause:Apple scab is caused by the fungal pathogen Venturia inaequalis. It thrives in wet and humid conditions, leading to dark, scaly lesions on leaves and fruit.Treatment :Use fungicides such as fixed copper, Bordeaux mixtures, copper soaps (copper octanoate), sulfur, mineral or neem oils, and myclobutanil.Myclobutanil is a synthetic fungicide, while the others are considered organically acceptable.Apply copper- or sulfur-based protectant sprays to prevent the disease.'},
-
-'Apple Black Rot':{'Cause:Apple black rot is caused by the fungus Diplodia seriata. The disease is promoted by warm temperatures, frequent rain, and prolonged wet conditions, which facilitate fruit infection. Treatment:Apply copper-based products, lime-sulfur, Daconil, Ziram, or Mancozeb as fungicidal treatments.Remove mummified fruit (shriveled and dried fruit) attached to the tree to prevent further spread.'},
-
-'Cedar Apple Rust':{'Cause:Cedar apple rust is caused by multiple fungal species from the genus Gymnosporangium. This disease requires both apple and juniper trees for its life cycle, making proximity a key factor in its spread.Treatment:Use fungicides containing myclobutanil, which are the most effective in preventing rust.Copper and sulfur-based products can also be applied.Maintain a minimum distance of one mile between apple and juniper trees to reduce infection risk.'},
-
-'Cherry Powdery Mildew':{'Cause:Cherry powdery mildew is caused by the fungus Podosphaera clandestina. It thrives in warm, humid conditions with low rainfall.Treatment:Apply fungicides soon after petal fall and repeat 2 to 3 weeks later if necessary.Recommended fungicides include:Bonide Sulfur Plant Fungicide,Hi-Yield Snake Eyes Dusting Wettable Sulfur,Monterey Horticultural Oil,Spectracide IMMUNOX Multi-Purpose Fungicide Spray Concentrate,Tebucon 45 DF, Tesaris, Topguard SC, Topguard EQ, Topsin 4.5 FL, Torino.'},
-
-'Cercospora Leaf Spot':{'Cause:Cercospora leaf spot is caused by multiple species of Cercospora fungi. The disease spreads via airborne conidia (fungal spores transported through the air).Treatment:Apply fungicides, including:Mancozeb (400 g/acre),Copper oxychloride (500 g/acre),Carbendazim (200 g/acre),Propiconazole (200 ml/acre),Metiram (200 g/acre),Kresoxim-methyl (200 ml/acre),SYSTHANE (contains myclobutanil),HERITAGE (contains azoxystrobin).Remove infected plant material to prevent further spread.'},
-
-'Corn Common Rust':{'Cause:Common rust in corn is caused by the fungus Puccinia sorghi.Treatment:Use fungicides such as:Chlorothalonil,Mancozeb,Kresoxim-methyl,Tebuconazole,Pyraclostrobin,Azoxystrobin,Plant corn hybrids with genetic resistance to the disease.'},
-
-'Corn Northern Leaf Blight':{'Cause:Northern leaf blight in corn is caused by the fungus Exserohilum turcicum.Treatment:Apply appropriate fungicides to control the infection.Use endophytic Trichoderma as a biological control agent to suppress the disease.'}}
 # Sidebar for navigation
 st.sidebar.title(translate_text("Navigation"))
+pages = ["Disease Prediction", "Nearest Fertilizers", "Chat", "Dose Calculator"]
+# Options are translated for display only, the selection is compared in English
 option = st.sidebar.radio(
     translate_text("Select an option"), 
-    [
-        translate_text("Disease Prediction"),
-        translate_text("Nearest Fertilizers"),
-        translate_text("Chat"),
-        translate_text("Dose Calculator"),
-    ]
+    pages,
+    format_func=translate_text,
 )
-if option == translate_text("Disease Prediction"):
+if option == "Disease Prediction":
+    from model_registry import get_model_entry
+    from batching import get_batcher
+    from preprocessing import preprocess, VERSION as PREPROCESSING_VERSION
+
     st.markdown(f"**{translate_text('Please input only leaf Images of Apple, Cherry, Corn, Grape, Peach, Pepper, Potato, Strawberry, and Tomato. Otherwise, the model will not work perfectly.')}**")
 
     # File uploader for image input
     uploaded_file = st.file_uploader(translate_text("Upload an image"))
     if uploaded_file is not None:
-        image_bytes = uploaded_file.read()
-        img = cv.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv.IMREAD_COLOR)
-        normalized_image = np.expand_dims(cv.resize(cv.cvtColor(img, cv.COLOR_BGR2RGB), (150, 150)), axis=0)
-        predictions = model.predict(normalized_image)
+        # Load the model with error handling (loaded once per process and shared across sessions)
+        try:
+            model_entry = get_model_entry()
+        except Exception as e:
+            st.error(f"Error loading model: {str(e)}")
+            st.stop()
+
+        image_bytes = uploaded_file.getvalue()
+
+        @metrics.timed("prediction", profile=True)
+        def run_prediction():
+            # Shared with the API, so both produce exactly the same pixels for the same file
+            with metrics.stage_timer("image.preprocess"):
+                normalized_image = preprocess(image_bytes)
+            if normalized_image is None:
+                raise ValueError("Could not read this image. Please upload a JPG or PNG file.")
+            # Goes through the shared micro-batching queue so concurrent sessions share predict calls
+            with metrics.stage_timer("model.predict"):
+                return get_batcher(model_entry).predict(normalized_image)
+
+        # Re-uploads and reruns of the same photo are served from the prediction cache
+        try:
+            predictions = np.expand_dims(prediction_cache.get_or_compute(
+                image_bytes, model_identity(model_entry.path, PREPROCESSING_VERSION), run_prediction), axis=0)
+        except ValueError as e:
+            st.error(translate_text(str(e)))
+            st.stop()
         st.image(image_bytes)
 
-        if predictions[0][np.argmax(predictions)] * 100 >= 80:
-            st.write(translate_text(f"Result is: {label_name[np.argmax(predictions)]}"))
-            disease_name = label_name[np.argmax(predictions)]
-            formatted_disease_name = disease_name.title()  # Converts to Title Case
-            if formatted_disease_name in disease_treatments:
-                st.write(translate_text(disease_treatments[formatted_disease_name]))
-            else:
-                st.write(translate_text("No treatment found for this disease."))
+        class_id = int(np.argmax(predictions))
+        # Record each upload once for outbreak statistics (reruns show the same upload again),
+        # with the location from the shop finder if the user has searched for one
+        if st.session_state.get("logged_upload") != uploaded_file.file_id:
+            st.session_state["logged_upload"] = uploaded_file.file_id
+            get_prediction_log().log(class_id, predictions[0][class_id], user=st.session_state.get("username"),
+                                     lat=st.session_state.get("latitude"), lon=st.session_state.get("longitude"))
+        if predictions[0][class_id] * 100 >= 80:
+            # Every class has a catalogue entry, looked up directly by the model's output index
+            label, treatment = localized_treatment(class_id, st.session_state["language"])
+            st.write(f"{translate_text('Result is:')} {label}")
+            st.write(treatment)
+            entry = lookup_treatment(class_id)
+            if entry.fertilizer_crop and not entry.healthy:
+                st.caption(translate_text(f"See the Dose Calculator for {entry.crop} application rates."))
         else:
             st.write(translate_text("Try Another Image"))
 
-elif option == translate_text("Nearest Fertilizers"):
+elif option == "Nearest Fertilizers":
+    import folium
+    from streamlit_folium import folium_static
+
     st.title(translate_text("🌱 Nearest Fertilizer Shops Finder"))
 
     # Store user input in session state
@@ -284,8 +182,10 @@ elif option == translate_text("Nearest Fertilizers"):
 
             # Display location details
             if "latitude" in st.session_state and "longitude" in st.session_state:
-                st.write(translate_text(f"✅ **Location Found:** {st.session_state['location']}"))
-                st.write(translate_text(f"🌍 **Latitude:** {st.session_state['latitude']}, **Longitude:** {st.session_state['longitude']}"))
+                # User input and coordinates are formatted into translated labels, not sent to the translator
+                st.write(f"✅ **{translate_text('Location Found:')}** {st.session_state['location']}")
+                st.write(f"🌍 **{translate_text('Latitude:')}** {st.session_state['latitude']}, "
+                         f"**{translate_text('Longitude:')}** {st.session_state['longitude']}")
 
             if error:
                 st.error(error)
@@ -294,10 +194,16 @@ elif option == translate_text("Nearest Fertilizers"):
                 map_center = [st.session_state["latitude"], st.session_state["longitude"]]
                 map_ = folium.Map(location=map_center, zoom_start=11)  # Adjust zoom level
 
+                # Shop names and addresses are one-off values: translated in one call and not cached
+                shop_texts = get_translation_cache().translate_many(
+                    [text for shop in fertilizer_shops for text in (shop['name'], shop['address'])],
+                    st.session_state["language"], cache=False)
                 for i, shop in enumerate(fertilizer_shops, 1):
-                    st.write(translate_text(f"**{i}. {shop['name']}**"))
-                    st.write(translate_text(f"📍 {shop['address']}"))
-                    st.write(translate_text(f"🌍 Latitude: {shop['latitude']}, Longitude: {shop['longitude']}"))
+                    name, address = shop_texts[2 * i - 2], shop_texts[2 * i - 1]
+                    st.write(f"**{i}. {name}**")
+                    st.write(f"📍 {address}")
+                    st.write(f"🌍 {translate_text('Latitude:')} {shop['latitude']}, "
+                             f"{translate_text('Longitude:')} {shop['longitude']}")
                     st.write("---")
                     
                     # Add marker to map
@@ -312,37 +218,83 @@ elif option == translate_text("Nearest Fertilizers"):
         else:
             st.warning(translate_text("⚠️ Please enter a valid location."))
 
-elif option == translate_text("Chat"):
+elif option == "Chat":
     chat()
-elif option==translate_text("Dose Calculator"):
+elif option=="Dose Calculator":
     st.title("🌱 Fertilizer & Insecticide Calculator")
 
+    mode = st.radio("Mode:", ["Single plot", "Bulk (CSV/Parquet)"], horizontal=True)
+
+    if mode == "Bulk (CSV/Parquet)":
+        import io
+        from dose_planner import plan, read_plots
+
+        # Cached by file contents, so reruns of the page don't re-plan or re-encode the download
+        @st.cache_data(max_entries=4)
+        def plan_upload(data, name):
+            with metrics.stage_timer("doses.plan"):
+                per_plot, totals = plan(read_plots(io.BytesIO(data), name))
+            return (per_plot, totals, per_plot.to_csv(index=False, float_format="%.4f"),
+                    totals.to_csv(index=False, float_format="%.4f"))
+
+        st.write("Upload a table with **plot**, **crop** and **area** (acres) columns, "
+                 "plus an optional **disease** column.")
+        plots_file = st.file_uploader("Upload plots", type=["csv", "parquet"])
+        if plots_file is not None:
+            try:
+                per_plot, totals, per_plot_csv, totals_csv = plan_upload(plots_file.getvalue(), plots_file.name)
+            except ValueError as e:
+                st.error(f"⚠️ {e}")
+                st.stop()
+            skipped = int((per_plot["error"] != "").sum())
+            st.subheader(f"🧪 Totals for {len(per_plot) - skipped} plots")
+            if skipped:
+                st.warning(f"⚠️ {skipped} plots skipped (unknown crop or invalid area), see the error column.")
+            st.dataframe(totals, hide_index=True)
+            st.dataframe(per_plot.head(1000), hide_index=True)
+            st.download_button("Download per-plot doses (CSV)", per_plot_csv, file_name="plot_doses.csv",
+                               mime="text/csv")
+            st.download_button("Download totals (CSV)", totals_csv, file_name="dose_totals.csv", mime="text/csv")
+    else:
 # User Inputs
-    crop = st.selectbox("Select Crop:", list(fertilizer_data.keys()))
-    land_area = st.number_input("Enter Land Area (in Acres):", min_value=0.1, step=0.1)
+        crop = st.selectbox("Select Crop:", list(fertilizer_data.keys()))
+        land_area = st.number_input("Enter Land Area (in Acres):", min_value=0.1, step=0.1)
 
 # Display Results
-    if st.button("Calculate"):
-        if crop in fertilizer_data:
-            st.subheader("🧪 Required Fertilizers & Insecticides")
-            
-            # Fungicides
-            st.write("### **Fungicides Required**")
-            for name, amount in fertilizer_data[crop]["Fungicide"].items():
-                st.write(f"✅ {name}: **{amount * land_area:.3f} kg**")
-
-            # Insecticides
-            st.write("### **Insecticides Required**")
-            for name, amount in fertilizer_data[crop]["Insecticide"].items():
-                st.write(f"✅ {name}: **{amount * land_area:.3f} kg**")
+        if st.button("Calculate"):
+            if crop in fertilizer_data:
+                st.subheader("🧪 Required Fertilizers & Insecticides")
 
-        else:
-            st.error("⚠️ Please select a valid crop.")
+                # Fungicides
+                st.write("### **Fungicides Required**")
+                for name, amount in fertilizer_data[crop]["Fungicide"].items():
+                    st.write(f"✅ {name}: **{amount * land_area:.3f} kg**")
+
+                # Insecticides
+                st.write("### **Insecticides Required**")
+                for name, amount in fertilizer_data[crop]["Insecticide"].items():
+                    st.write(f"✅ {name}: **{amount * land_area:.3f} kg**")
+
+            else:
+                st.error("⚠️ Please select a valid crop.")
 
 
 # Check login status
 
 
+# Hidden diagnostics panel, opened by adding ?diagnostics=1 to the URL
+if st.query_params.get("diagnostics") == "1":
+    with st.sidebar.expander("🛠 Diagnostics"):
+        stages, counters, components = metrics.summary()
+        st.write("**Stage timings**")
+        st.dataframe(stages, hide_index=True)
+        st.write("**Models**")
+        st.json(registry_stats())
+        st.write("**Inference queue**")
+        st.json(batcher_stats())
+        st.write("**Caches and chat**")
+        st.json({**counters, **components})
+
 # ✅ Logout Button in Sidebar
 if st.sidebar.button("Logout"):
     st.session_state["logged_in"] = False
@@ -0,0 +1,180 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds (Prometheus defaults plus a few slow buckets for Overpass)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Opt-in sampling profiler: requests slower than LEAF_PROFILE_SLOW_MS dump a folded-stack profile
+PROFILE_SLOW_MS = float(os.environ.get("LEAF_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("LEAF_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.environ.get("LEAF_PROFILE_DIR", "profiles")
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+
+    # Function to estimate a quantile from the bucket counts (upper bound of the bucket it falls in)
+    def quantile(self, q):
+        target, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= target and self.count:
+                return bound
+        return float("inf") if self.count else 0.0
+
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = Counter()
+_collectors = {}
+
+
+def observe(stage, seconds):
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+# Function to export numbers owned by another module (cache hit counters, queue depth, ...)
+def register_collector(name, fn):
+    _collectors[name] = fn
+
+
+class _Sampler:
+    """Samples one thread's stack at a fixed interval and keeps collapsed stack counts."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    # Function to write the profile in the folded format read by flamegraph.pl and speedscope
+    def dump(self, stage, elapsed):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{stage.replace('.', '_')}-{int(time.time() * 1000)}-{elapsed * 1000:.0f}ms.folded")
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+# Context manager timing one stage; with profile=True it also samples the stack when profiling is on
+@contextmanager
+def stage_timer(stage, profile=False):
+    sampler = None
+    if profile and PROFILE_SLOW_MS > 0:
+        sampler = _Sampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(stage, elapsed)
+        if sampler is not None:
+            sampler.stop()
+            if elapsed * 1000 >= PROFILE_SLOW_MS:
+                sampler.dump(stage, elapsed)
+                increment("slow_profiles_written")
+
+
+# Decorator version of stage_timer
+def timed(stage, profile=False):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage, profile):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Function to summarise every stage as count / mean / p50 / p95 (for the diagnostics panel)
+def summary():
+    with _lock:
+        rows = [{"stage": stage, "count": h.count, "mean_ms": round(h.sum / h.count * 1000, 2) if h.count else 0,
+                 "p50_ms": h.quantile(0.5) * 1000, "p95_ms": h.quantile(0.95) * 1000}
+                for stage, h in sorted(_histograms.items())]
+        counters = dict(_counters)
+    return rows, counters, collect()
+
+
+def collect():
+    values = {}
+    for name, fn in list(_collectors.items()):
+        try:
+            for key, value in fn().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values[f"{name}_{key}"] = value
+        except Exception:
+            continue
+    return values
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Function to render everything in the Prometheus text exposition format
+def render_prometheus():
+    lines = ["# HELP leaf_stage_duration_seconds Time spent in each processing stage",
+             "# TYPE leaf_stage_duration_seconds histogram"]
+    with _lock:
+        for stage, h in sorted(_histograms.items()):
+            label = _escape(stage)
+            cumulative = 0
+            for bound, n in zip(BUCKETS, h.buckets):
+                cumulative += n
+                lines.append(f'leaf_stage_duration_seconds_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'leaf_stage_duration_seconds_bucket{{stage="{label}",le="+Inf"}} {h.count}')
+            lines.append(f'leaf_stage_duration_seconds_sum{{stage="{label}"}} {h.sum}')
+            lines.append(f'leaf_stage_duration_seconds_count{{stage="{label}"}} {h.count}')
+        counters = sorted(_counters.items())
+
+    lines += ["# HELP leaf_events_total Event counters", "# TYPE leaf_events_total counter"]
+    lines += [f'leaf_events_total{{name="{_escape(name)}"}} {value}' for name, value in counters]
+
+    lines += ["# HELP leaf_component_value Values reported by caches, queues and models",
+              "# TYPE leaf_component_value gauge"]
+    lines += [f'leaf_component_value{{name="{_escape(name)}"}} {value}' for name, value in sorted(collect().items())]
+    return "\n".join(lines) + "\n"
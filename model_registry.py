@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+from inference_backends import MODEL_BACKEND, artifact_path, load_backend
+
+# Default location of the leaf disease model (can be overridden with LEAF_MODEL_PATH), mapped to
+# the exported .tflite/.onnx artifact when LEAF_MODEL_BACKEND selects another runtime
+DEFAULT_MODEL_PATH = artifact_path(os.environ.get("LEAF_MODEL_PATH", "Training/model/Leaf Deases(96,88).h5"),
+                                   MODEL_BACKEND)
+
+# Load the model in a background thread after login (set LEAF_MODEL_WARMUP=0 to disable)
+WARMUP = os.environ.get("LEAF_MODEL_WARMUP", "1") == "1"
+
+_registry = {}
+_registry_lock = threading.Lock()
+_warmups = set()
+
+
+class ModelEntry:
+    """A loaded model shared by every session and rerun in this process."""
+
+    def __init__(self, path, model, load_seconds, weight_bytes, rss_delta_bytes):
+        self.path = path
+        self.model = model
+        self.backend = model.name
+        self.load_seconds = load_seconds
+        self.weight_bytes = weight_bytes
+        self.rss_delta_bytes = rss_delta_bytes
+        self.loaded_at = time.time()
+        self._predict_lock = threading.Lock()
+
+    # Function to run inference (neither Keras predict nor a TFLite interpreter is safe to call concurrently)
+    def predict(self, batch):
+        with self._predict_lock:
+            return self.model.predict(batch)
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "backend": self.backend,
+            "load_seconds": round(self.load_seconds, 3),
+            "weight_mb": round(self.weight_bytes / 1024 / 1024, 2),
+            "rss_delta_mb": round(self.rss_delta_bytes / 1024 / 1024, 2),
+            "loaded_at": self.loaded_at,
+        }
+
+
+# Function to read the resident set size of this process in bytes
+def _current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is in kilobytes on Linux (peak, not current, but good enough as a fallback)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Function to load a model from disk with the backend matching its file type
+def _load(path):
+    rss_before = _current_rss()
+    start = time.perf_counter()
+    backend = load_backend(path)
+    load_seconds = time.perf_counter() - start
+    return ModelEntry(path, backend, load_seconds, backend.weight_bytes(), max(_current_rss() - rss_before, 0))
+
+
+# Function to get a model, loading it only the first time it is requested in this process
+def get_model_entry(path=DEFAULT_MODEL_PATH):
+    entry = _registry.get(path)
+    if entry is not None:
+        return entry
+    with _registry_lock:
+        # Another thread may have finished loading while we waited for the lock
+        entry = _registry.get(path)
+        if entry is None:
+            entry = _load(path)
+            _registry[path] = entry
+    return entry
+
+
+# Function to start loading a model in the background (at most once per path and process)
+def warm_up(path=DEFAULT_MODEL_PATH):
+    if not WARMUP or path in _registry or path in _warmups:
+        return
+    with _registry_lock:
+        if path in _warmups:
+            return
+        _warmups.add(path)
+
+    def load():
+        try:
+            get_model_entry(path)
+        except Exception:
+            pass  # The error is shown when the prediction page asks for the model
+
+    threading.Thread(target=load, name="leaf-model-warmup", daemon=True).start()
+
+
+def get_model(path=DEFAULT_MODEL_PATH):
+    return get_model_entry(path).model
+
+
+def is_loaded(path=DEFAULT_MODEL_PATH):
+    return path in _registry
+
+
+# Function to report load time and memory of every model loaded so far
+def registry_stats():
+    return [entry.stats() for entry in list(_registry.values())]
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# In-memory entry cap and optional on-disk tier (set LEAF_PREDICTION_CACHE_DB to enable it)
+MAX_ENTRIES = int(os.environ.get("LEAF_PREDICTION_CACHE_SIZE", "1024"))
+DISK_PATH = os.environ.get("LEAF_PREDICTION_CACHE_DB")
+
+
+# Function to identify a model file (and the preprocessing feeding it) so cached predictions are
+# dropped when either changes; NUL separates the parts since it can't appear in a path
+def model_identity(path, preprocessing_version=""):
+    try:
+        stat = os.stat(path)
+        identity = f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+    except OSError:
+        identity = os.path.abspath(path)
+    return f"{identity}\0{preprocessing_version}"
+
+
+def make_key(data, model_id):
+    return hashlib.sha256(model_id.encode() + b"\0" + bytes(data)).hexdigest()
+
+
+class PredictionCache:
+    """LRU cache of prediction vectors keyed by a hash of the uploaded bytes plus the model identity."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, disk_path=DISK_PATH):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_path:
+            conn = self._connect()
+            conn.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, prediction BLOB NOT NULL)")
+            conn.commit()
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.disk_path, timeout=10)
+
+    def get(self, key):
+        with self._lock:
+            prediction = self._entries.get(key)
+            if prediction is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return prediction
+
+        if self.disk_path:
+            conn = self._connect()
+            row = conn.execute("SELECT prediction FROM predictions WHERE key = ?", (key,)).fetchone()
+            conn.close()
+            if row is not None:
+                prediction = np.frombuffer(row[0], dtype=np.float32)
+                self._remember(key, prediction)
+                with self._lock:
+                    self.disk_hits += 1
+                return prediction
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, prediction):
+        prediction = np.asarray(prediction, dtype=np.float32).ravel()
+        prediction.flags.writeable = False
+        self._remember(key, prediction)
+        if self.disk_path:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO predictions (key, prediction) VALUES (?, ?)",
+                         (key, prediction.tobytes()))
+            conn.commit()
+            conn.close()
+
+    def _remember(self, key, prediction):
+        with self._lock:
+            self._entries[key] = prediction
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # Function to return the cached prediction, computing and storing it on a miss
+    def get_or_compute(self, data, model_id, compute):
+        key = make_key(data, model_id)
+        prediction = self.get(key)
+        if prediction is None:
+            prediction = compute()
+            self.put(key, prediction)
+        return prediction
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+
+# Shared process-wide cache used by the Streamlit page and the Flask API
+prediction_cache = PredictionCache()
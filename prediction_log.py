@@ -0,0 +1,304 @@
+"""Append-only log of predictions for outbreak monitoring, with hourly and daily rollups per geo cell.
+
+    python prediction_log.py top --lat 17.385 --lon 78.487 --radius-km 50 --days 7
+    python prediction_log.py top --days 30 --crop Tomato
+
+log() only puts the event on a queue; a background thread writes events in batches and updates
+hourly and daily (period, cell, class) rollups in the same transaction, so a region query reads
+rollup rows for the cells around the point instead of millions of events. Cells are the 0.1°
+grid of shop_index.py, so radius queries are answered at cell resolution.
+"""
+import argparse
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+import numpy as np
+
+from shop_index import CELL_DEG, haversine
+from treatment_catalogue import CATALOGUE
+
+LOG_PATH = os.environ.get("LEAF_PREDICTION_LOG_DB", "prediction_log.db")
+# Events written per transaction, and the longest an event waits in the buffer before it's written
+FLUSH_SIZE = int(os.environ.get("LEAF_PREDICTION_LOG_BATCH", "500"))
+FLUSH_SECONDS = float(os.environ.get("LEAF_PREDICTION_LOG_FLUSH_SECONDS", "1"))
+# Events beyond this many waiting are dropped (and counted) rather than slowing predictions down
+MAX_PENDING = int(os.environ.get("LEAF_PREDICTION_LOG_MAX_PENDING", "100000"))
+# Same threshold the Disease Prediction page uses to show a result
+CONFIDENT = 0.8
+# Cell value for events without a location (rollup keys can't be NULL)
+NO_CELL = -99999
+# Cell of the extra rollup rows that total every event, located or not (for queries without a radius)
+ALL_CELLS = 99999
+KM_PER_DEGREE = 111.32
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        user TEXT,
+        source TEXT NOT NULL,
+        class_id INTEGER NOT NULL,
+        confidence REAL NOT NULL,
+        lat REAL,
+        lon REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts)",
+] + [
+    # Rollups keyed time first, so a query seeks straight to (period, cell row) for each period in its window
+    f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        {period} INTEGER NOT NULL,
+        cell_lat INTEGER NOT NULL,
+        cell_lon INTEGER NOT NULL,
+        class_id INTEGER NOT NULL,
+        events INTEGER NOT NULL,
+        confident INTEGER NOT NULL,
+        confidence_sum REAL NOT NULL,
+        PRIMARY KEY ({period}, cell_lat, cell_lon, class_id)
+    ) WITHOUT ROWID
+    """
+    for table, period in [("hourly", "hour"), ("daily", "day")]
+]
+
+
+# Every log in this process, so a forked child can give each one a writer thread of its own
+_live_logs = weakref.WeakSet()
+
+
+def cell_of(lat, lon):
+    if lat is None or lon is None:
+        return NO_CELL, NO_CELL
+    return int(math.floor(lat / CELL_DEG)), int(math.floor(lon / CELL_DEG))
+
+
+class PredictionLog:
+    """Buffers prediction events in memory and writes them to SQLite from a background thread."""
+
+    def __init__(self, path=LOG_PATH, flush_size=FLUSH_SIZE, flush_seconds=FLUSH_SECONDS, max_pending=MAX_PENDING):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.counters = {"logged": 0, "dropped": 0, "written": 0, "batches": 0, "write_errors": 0}
+        self.last_batch_ms = 0.0
+        self._stats_lock = threading.Lock()
+        conn = self._connect()
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+        conn.close()
+        self._start()
+        _live_logs.add(self)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def _start(self):
+        self._queue = queue.Queue(maxsize=self.max_pending)
+        self._writer = threading.Thread(target=self._run, args=(self._queue,), name="leaf-prediction-log",
+                                        daemon=True)
+        self._writer.start()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.counters[name] += amount
+
+    # Function to record one prediction; never blocks, the event is written by the background thread
+    def log(self, class_id, confidence, user=None, lat=None, lon=None, source="app", ts=None):
+        event = (ts or time.time(), user, source, int(class_id), float(confidence),
+                 None if lat is None else float(lat), None if lon is None else float(lon))
+        try:
+            self._queue.put_nowait(event)
+            self._count("logged")
+        except queue.Full:
+            self._count("dropped")
+
+    # Function to wait until everything logged so far has been written
+    def flush(self, timeout=10):
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self, pending):
+        conn = self._connect()
+        while True:
+            batch, markers = [], []
+            item = pending.get()
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                if isinstance(item, threading.Event):
+                    markers.append(item)
+                    break  # flush() was called, write now
+                batch.append(item)
+                if len(batch) >= self.flush_size:
+                    break
+                try:
+                    item = pending.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.write_batch(batch, conn)
+                except sqlite3.Error:
+                    self._count("write_errors")
+            for marker in markers:
+                marker.set()
+
+    # Function to write events and fold them into the hourly and daily rollups in one transaction
+    def write_batch(self, events, conn=None):
+        own = conn is None
+        conn = conn or self._connect()
+        start = time.perf_counter()
+        hourly = defaultdict(lambda: [0, 0, 0.0])
+        for ts, _, _, class_id, confidence, lat, lon in events:
+            hour = int(ts // 3600)
+            for key in ((hour, *cell_of(lat, lon), class_id), (hour, ALL_CELLS, ALL_CELLS, class_id)):
+                row = hourly[key]
+                row[0] += 1
+                row[1] += confidence >= CONFIDENT
+                row[2] += confidence
+        daily = defaultdict(lambda: [0, 0, 0.0])
+        for (hour, *key), values in hourly.items():
+            row = daily[(hour // 24, *key)]
+            for i, value in enumerate(values):
+                row[i] += value
+        try:
+            with conn:
+                conn.executemany("INSERT INTO events (ts, user, source, class_id, confidence, lat, lon) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?)", events)
+                for table, period, rollup in [("hourly", "hour", hourly), ("daily", "day", daily)]:
+                    conn.executemany(f"""
+                        INSERT INTO {table} ({period}, cell_lat, cell_lon, class_id, events, confident, confidence_sum)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT ({period}, cell_lat, cell_lon, class_id) DO UPDATE SET
+                            events = events + excluded.events,
+                            confident = confident + excluded.confident,
+                            confidence_sum = confidence_sum + excluded.confidence_sum
+                    """, [(*key, *values) for key, values in rollup.items()])
+        finally:
+            if own:
+                conn.close()
+        with self._stats_lock:
+            self.counters["written"] += len(events)
+            self.counters["batches"] += 1
+            self.last_batch_ms = (time.perf_counter() - start) * 1000
+
+    # Function to rank classes by confident predictions, optionally within radius_km of a point and for one crop
+    def top_diseases(self, lat=None, lon=None, radius_km=None, days=7, crop=None, limit=10,
+                     include_healthy=False, now=None):
+        now = now or time.time()
+        since_hour = int((now - days * 86400) // 3600)
+        first_day = -(-since_hour // 24)
+        # The window is the hours left of its first (partial) day plus whole days from the daily rollup
+        periods = [("hourly", "hour", list(range(since_hour, first_day * 24))),
+                   ("daily", "day", list(range(first_day, int(now // 86400) + 1)))]
+        classes = [e.class_id for e in CATALOGUE
+                   if (include_healthy or not e.healthy) and (crop is None or e.crop.lower() == crop.lower())]
+
+        near = lat is not None and lon is not None and radius_km is not None
+        if near:
+            # Cells overlapping the circle's bounding box; each period/cell row is one primary key seek
+            dlat = radius_km / KM_PER_DEGREE
+            dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+            cell_lats = list(range(math.floor((lat - dlat) / CELL_DEG), math.floor((lat + dlat) / CELL_DEG) + 1))
+            cell_lons = [math.floor((lon - dlon) / CELL_DEG), math.floor((lon + dlon) / CELL_DEG)]
+            columns, group = "cell_lat, cell_lon, class_id", "cell_lat, cell_lon, class_id"
+            cell_filter = f" AND cell_lat IN ({','.join('?' * len(cell_lats))}) AND cell_lon BETWEEN ? AND ?"
+            cell_params = cell_lats + cell_lons
+        else:
+            columns, group = "0, 0, class_id", "class_id"
+            cell_filter, cell_params = " AND cell_lat = ? AND cell_lon = ?", [ALL_CELLS, ALL_CELLS]
+
+        rows = []
+        conn = self._connect()
+        try:
+            for table, period, values in periods:
+                if not values:
+                    continue
+                sql = (f"SELECT {columns}, SUM(confident), SUM(events), SUM(confidence_sum) FROM {table} "
+                       f"WHERE {period} IN ({','.join('?' * len(values))}){cell_filter} "
+                       f"AND class_id IN ({','.join('?' * len(classes))}) GROUP BY {group}")
+                rows += conn.execute(sql, values + cell_params + classes).fetchall()
+        finally:
+            conn.close()
+        rows = np.array(rows, dtype=np.float64).reshape(-1, 6)
+
+        if near and len(rows):
+            # Keep cells that overlap the circle: distance to the closest point of each cell
+            nearest_lat = np.clip(lat, rows[:, 0] * CELL_DEG, (rows[:, 0] + 1) * CELL_DEG)
+            nearest_lon = np.clip(lon, rows[:, 1] * CELL_DEG, (rows[:, 1] + 1) * CELL_DEG)
+            rows = rows[haversine(lat, lon, nearest_lat, nearest_lon) <= radius_km * 1000]
+
+        class_ids = rows[:, 2].astype(np.int64)
+        confident = np.bincount(class_ids, weights=rows[:, 3], minlength=len(CATALOGUE))
+        events = np.bincount(class_ids, weights=rows[:, 4], minlength=len(CATALOGUE))
+        confidence_sum = np.bincount(class_ids, weights=rows[:, 5], minlength=len(CATALOGUE))
+        ranked = [i for i in np.argsort(-confident, kind="stable") if confident[i] > 0][:limit]
+        return [{"class_id": int(i), "label": CATALOGUE[i].label, "crop": CATALOGUE[i].crop,
+                 "disease": CATALOGUE[i].disease, "confident_predictions": int(confident[i]),
+                 "predictions": int(events[i]), "mean_confidence": round(float(confidence_sum[i] / events[i]), 4)}
+                for i in ranked]
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self.counters, pending=self._queue.qsize(), last_batch_ms=round(self.last_batch_ms, 3))
+
+
+_prediction_log = None
+_prediction_log_lock = threading.Lock()
+
+
+# Function to get the process-wide log, creating prediction_log.db and its writer thread on first use
+# rather than at import
+def get_prediction_log():
+    global _prediction_log
+    if _prediction_log is None:
+        with _prediction_log_lock:
+            if _prediction_log is None:
+                _prediction_log = PredictionLog()
+    return _prediction_log
+
+
+# The writer thread stays behind in the parent on fork(); events buffered there are the parent's to write
+def _restart_after_fork():
+    for log in list(_live_logs):
+        log._stats_lock = threading.Lock()
+        log._start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the prediction log")
+    sub = parser.add_subparsers(dest="command", required=True)
+    top = sub.add_parser("top", help="Top diseases over the last N days, optionally near a point")
+    top.add_argument("--lat", type=float)
+    top.add_argument("--lon", type=float)
+    top.add_argument("--radius-km", type=float, default=50)
+    top.add_argument("--days", type=float, default=7)
+    top.add_argument("--crop")
+    top.add_argument("--limit", type=int, default=10)
+    top.add_argument("--include-healthy", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = get_prediction_log().top_diseases(args.lat, args.lon, args.radius_km if args.lat is not None else None,
+                                                args.days, args.crop, args.limit, args.include_healthy)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{'disease':<45}{'confident':>10}{'all':>8}{'mean conf':>11}")
+    for row in results:
+        print(f"{row['label']:<45}{row['confident_predictions']:>10}{row['predictions']:>8}"
+              f"{row['mean_confidence']:>11.3f}")
+    print(f"✅ {len(results)} rows in {elapsed:.1f} ms")
@@ -0,0 +1,104 @@
+import struct
+import sys
+
+import cv2 as cv
+import numpy as np
+
+# Model input size (width, height); every entry point must produce exactly the same pixels
+TARGET_SIZE = (150, 150)
+# Bumped whenever the output pixels change, so cached predictions from older code are not reused
+VERSION = "2"
+
+# Only decode at reduced resolution while the image stays at least this many times the target size
+MIN_OVERSAMPLE = 2
+REDUCED_FLAGS = ((8, cv.IMREAD_REDUCED_COLOR_8), (4, cv.IMREAD_REDUCED_COLOR_4), (2, cv.IMREAD_REDUCED_COLOR_2))
+# Largest differences from the full-resolution reference pipeline accepted for a reduced decode (0-255 levels)
+MAX_MEAN_DIFFERENCE = 2.0
+MAX_P99_DIFFERENCE = 20
+
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+# Function to read (width, height) from a JPEG header without decoding it, None if not a JPEG
+def jpeg_size(data):
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        if marker == 0xFF or 0xD0 <= marker <= 0xD9 or marker == 0x01:
+            i += 1 if marker == 0xFF else 2
+            continue
+        i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    return None
+
+
+# Function to pick the imdecode flag: libjpeg can scale by 1/2, 1/4 or 1/8 while decoding
+def decode_flag(data):
+    size = jpeg_size(data)
+    if size is not None:
+        for factor, flag in REDUCED_FLAGS:
+            if (size[0] // factor >= TARGET_SIZE[0] * MIN_OVERSAMPLE
+                    and size[1] // factor >= TARGET_SIZE[1] * MIN_OVERSAMPLE):
+                return flag
+    return cv.IMREAD_COLOR
+
+
+# Function to decode image bytes and write the 150x150 RGB result into `out` (a uint8 HxWx3 view)
+def preprocess_into(data, out):
+    img = cv.imdecode(np.frombuffer(data, dtype=np.uint8), decode_flag(data))
+    if img is None:
+        return False
+    # Resize first, then swap channels on the small image; both write into preallocated memory
+    resized = cv.resize(img, TARGET_SIZE, dst=out)
+    cv.cvtColor(resized, cv.COLOR_BGR2RGB, dst=out)
+    return True
+
+
+# Function to preprocess one image, None if it can't be decoded
+def preprocess(data):
+    out = np.empty((TARGET_SIZE[1], TARGET_SIZE[0], 3), dtype=np.uint8)
+    return out if preprocess_into(data, out) else None
+
+
+# Function to preprocess many images into one batch array; returns the batch and the indexes that failed
+def preprocess_batch(items, out=None):
+    if out is None:
+        out = np.empty((len(items), TARGET_SIZE[1], TARGET_SIZE[0], 3), dtype=np.uint8)
+    failed = [i for i, data in enumerate(items) if not preprocess_into(data, out[i])]
+    return out[:len(items)], failed
+
+
+# Function to run the original full-resolution pipeline (imdecode -> cvtColor -> resize), the reference
+# that preprocess() is checked against in tests/test_preprocessing.py
+def reference_preprocess(data):
+    img = cv.imdecode(np.frombuffer(data, dtype=np.uint8), cv.IMREAD_COLOR)
+    if img is None:
+        return None
+    return cv.resize(cv.cvtColor(img, cv.COLOR_BGR2RGB), TARGET_SIZE)
+
+
+# Function to compare preprocess() with the reference pipeline, returns (mean, 99th percentile) abs pixel difference.
+# Images decoded at full resolution match exactly; a reduced JPEG decode averages pixels the reference
+# resize skips, so it differs by a level or two on average.
+def reference_difference(data):
+    diff = np.abs(preprocess(data).astype(np.int16) - reference_preprocess(data).astype(np.int16))
+    return float(diff.mean()), float(np.percentile(diff, 99))
+
+
+if __name__ == "__main__":
+    # python preprocessing.py leaf1.jpg leaf2.png ...
+    ok = True
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            mean, p99 = reference_difference(f.read())
+        within = mean <= MAX_MEAN_DIFFERENCE and p99 <= MAX_P99_DIFFERENCE
+        ok &= within
+        print(f"{'✅' if within else '❌'} {path}: mean {mean:.2f}, p99 {p99:.0f} levels from the reference")
+    sys.exit(0 if ok else 1)
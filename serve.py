@@ -0,0 +1,16 @@
+"""Production entry point for the inference API.
+
+    gunicorn -c gunicorn.conf.py serve:app
+
+"API/Make API.py" can't be imported by module name (the file name has a space), so it is
+loaded by path here and its Flask app re-exported for the WSGI server.
+"""
+import importlib.util
+import os
+
+_spec = importlib.util.spec_from_file_location(
+    "make_api", os.path.join(os.path.dirname(os.path.abspath(__file__)), "API", "Make API.py"))
+make_api = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(make_api)
+
+app = make_api.app
@@ -0,0 +1,194 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sqlite3
+import threading
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from geo_cache import SHOP_TAGS, SEARCH_RADIUS_M
+
+# Local copy of agricultural shops built by `python shop_index.py <extract>`
+INDEX_PATH = os.environ.get("LEAF_SHOP_INDEX_DB", "shop_index.db")
+# Grid cell size in degrees (~11 km at the equator)
+CELL_DEG = 0.1
+EARTH_RADIUS_M = 6371000.0
+
+
+# Function to compute haversine distances (in metres) from one point to arrays of points
+def haversine(lat, lon, lats, lons):
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _cell(lat, lon):
+    return int(math.floor(lat / CELL_DEG)), int(math.floor(lon / CELL_DEG))
+
+
+class ShopIndex:
+    """In-memory grid index over shop coordinates answering radius and k-nearest queries."""
+
+    def __init__(self, names, addresses, shop_types, lats, lons):
+        self.names = names
+        self.addresses = addresses
+        self.shop_types = shop_types
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        cells = {}
+        for i, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+            cells.setdefault(_cell(lat, lon), []).append(i)
+        self.cells = {key: np.array(ids, dtype=np.int64) for key, ids in cells.items()}
+
+    def __len__(self):
+        return len(self.lats)
+
+    # Function to collect candidate shop ids from every grid cell overlapping the search box
+    def _candidates(self, lat, lon, radius):
+        dlat = math.degrees(radius / EARTH_RADIUS_M)
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        lat_lo, lon_lo = _cell(lat - dlat, lon - dlon)
+        lat_hi, lon_hi = _cell(lat + dlat, lon + dlon)
+        if (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1) > len(self.cells):
+            return np.arange(len(self.lats))
+        found = [self.cells[(i, j)] for i in range(lat_lo, lat_hi + 1) for j in range(lon_lo, lon_hi + 1)
+                 if (i, j) in self.cells]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    # Function to find every shop within radius metres, nearest first
+    def within(self, lat, lon, radius=SEARCH_RADIUS_M):
+        ids = self._candidates(lat, lon, radius)
+        distances = haversine(lat, lon, self.lats[ids], self.lons[ids])
+        keep = distances <= radius
+        ids, distances = ids[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return [self._result(ids[i], distances[i]) for i in order]
+
+    # Function to find the k nearest shops, widening the search ring until k are inside it
+    def nearest(self, lat, lon, k=10):
+        if len(self.lats) == 0:
+            return []
+        radius = SEARCH_RADIUS_M
+        while True:
+            ids = self._candidates(lat, lon, radius)
+            distances = haversine(lat, lon, self.lats[ids], self.lons[ids])
+            inside = distances <= radius
+            if inside.sum() >= k or len(ids) == len(self.lats):
+                order = np.argsort(distances, kind="stable")[:k]
+                return [self._result(ids[i], distances[i]) for i in order]
+            radius *= 2
+
+    def _result(self, i, distance):
+        return {
+            "name": self.names[i],
+            "latitude": float(self.lats[i]),
+            "longitude": float(self.lons[i]),
+            "address": self.addresses[i],
+            "shop": self.shop_types[i],
+            "distance_km": round(float(distance) / 1000, 3),
+        }
+
+
+# Readers for the supported dump formats, each yielding (name, address, shop, lat, lon)
+# Only top-level elements (node, way, relation, ...) are kept until their end tag; each is cleared
+# with its tag/nd children once read, and the root's list of emptied children is dropped as it goes
+def read_osm(path, clear_every=10000):
+    root, depth, seen = None, 0, 0
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            root = elem if root is None else root
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        if elem.tag == "node":
+            tags = {t.get("k"): t.get("v") for t in elem.findall("tag")}
+            if tags.get("shop") in SHOP_TAGS:
+                yield (tags.get("name", "Unknown"), tags.get("addr:full", "Address not available"),
+                       tags["shop"], float(elem.get("lat")), float(elem.get("lon")))
+        elem.clear()
+        seen += 1
+        if seen % clear_every == 0:
+            root.clear()
+
+
+def read_geojson(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    for feature in data.get("features", []):
+        geometry = feature.get("geometry") or {}
+        props = feature.get("properties") or {}
+        if geometry.get("type") == "Point" and props.get("shop") in SHOP_TAGS:
+            lon, lat = geometry["coordinates"][:2]
+            yield (props.get("name", "Unknown"), props.get("addr:full", "Address not available"),
+                   props["shop"], float(lat), float(lon))
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("shop") in SHOP_TAGS:
+                yield (row.get("name") or "Unknown", row.get("address") or "Address not available",
+                       row["shop"], float(row["lat"]), float(row["lon"]))
+
+
+READERS = {".osm": read_osm, ".xml": read_osm, ".geojson": read_geojson, ".json": read_geojson, ".csv": read_csv}
+
+
+# Function to load an extract into the SQLite index file, replacing what was there
+def ingest(path, index_path=INDEX_PATH):
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ValueError(f"Unsupported file type: {path}")
+    conn = sqlite3.connect(index_path)
+    conn.execute("DROP TABLE IF EXISTS shops")
+    conn.execute("""
+        CREATE TABLE shops (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            address TEXT NOT NULL,
+            shop TEXT NOT NULL,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL
+        )
+    """)
+    conn.executemany("INSERT INTO shops (name, address, shop, latitude, longitude) VALUES (?, ?, ?, ?, ?)",
+                     reader(path))
+    conn.commit()
+    count = conn.execute("SELECT COUNT(*) FROM shops").fetchone()[0]
+    conn.close()
+    return count
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+# Function to get the process-wide index, or None when no extract has been ingested
+def get_index(index_path=INDEX_PATH):
+    global _index
+    if _index is None and os.path.exists(index_path):
+        with _index_lock:
+            if _index is None:
+                conn = sqlite3.connect(index_path)
+                try:
+                    rows = conn.execute("SELECT name, address, shop, latitude, longitude FROM shops").fetchall()
+                except sqlite3.OperationalError:
+                    rows = []
+                conn.close()
+                names, addresses, shop_types, lats, lons = (list(col) for col in zip(*rows)) if rows else ([],) * 5
+                _index = ShopIndex(names, addresses, shop_types, lats, lons)
+    return _index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local agricultural shop index from an OSM/GeoJSON/CSV dump")
+    parser.add_argument("extract", help="Path to a .osm, .geojson or .csv file")
+    parser.add_argument("--index", default=INDEX_PATH, help="SQLite file to write")
+    args = parser.parse_args()
+    print(f"✅ Indexed {ingest(args.extract, args.index)} shops into {args.index}")
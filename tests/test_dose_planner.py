@@ -0,0 +1,47 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from disease_data import fertilizer_data
+from dose_planner import PRODUCT_COLUMNS, plan, read_plots
+
+
+def plots_from_csv(text):
+    return read_plots(io.StringIO(text), "plots.csv")
+
+
+def test_class_id_with_blank_disease_cell_is_read_as_float():
+    plots = plots_from_csv("plot,crop,area,disease\np1,,2,3\np2,,1,\n")
+    assert plots["disease"].dtype.kind == "f"
+    per_plot, _ = plan(plots)
+    assert per_plot.loc[0, "crop"] == "apple"
+    assert pd.isna(per_plot.loc[1, "crop"])
+    assert list(per_plot["error"]) == ["", "unknown crop"]
+
+
+def test_disease_label_fills_missing_crop_and_fractional_ids_are_rejected():
+    per_plot, _ = plan(plots_from_csv("plot,crop,area,disease\np1,,1,Tomato healthy\np2,,1,3.5\np3,Corn,1,\n"))
+    assert per_plot.loc[0, "crop"] == "tomato"
+    assert per_plot.loc[2, "crop"] == "corn"
+    assert list(per_plot["error"]) == ["", "unknown crop", ""]
+
+
+def test_doses_and_totals_match_fertilizer_data():
+    plots = pd.DataFrame({"plot": ["a", "b", "c", "d"], "crop": ["potato", "Tomato", "potato", "mango"],
+                          "area": [2.0, 0.5, 1.5, 3.0]})
+    per_plot, totals = plan(plots)
+
+    for i, row in plots.iterrows():
+        crop = row["crop"].lower()
+        for column in PRODUCT_COLUMNS:
+            category, name = column[:-len(" (kg)")].split(": ", 1)
+            expected = fertilizer_data.get(crop, {}).get(category, {}).get(name, 0) * row["area"]
+            assert per_plot.loc[i, column] == expected
+    assert per_plot.loc[3, "error"] == "unknown crop"
+
+    potato_area = 3.5
+    for _, row in totals.iterrows():
+        expected = (fertilizer_data["potato"].get(row["category"], {}).get(row["product"], 0) * potato_area
+                    + fertilizer_data["tomato"].get(row["category"], {}).get(row["product"], 0) * 0.5)
+        assert np.isclose(row["total_kg"], expected)
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from import_time import PAGE_SCOPED, import_times, leaked_modules, startup_imports
+
+
+@pytest.fixture(scope="module")
+def startup_rows():
+    # import_times() imports the modules in a fresh interpreter, so nothing this test process loaded counts
+    return import_times(startup_imports())
+
+
+def test_startup_imports_include_the_login_page():
+    assert "login" in startup_imports()
+
+
+def test_no_page_scoped_module_is_imported_at_startup(startup_rows):
+    assert leaked_modules(startup_rows) == []
+
+
+def test_leak_check_sees_nested_imports():
+    # dose_planner is only imported by the Dose Calculator page, and it pulls in pandas
+    rows = import_times(["dose_planner"])
+    assert "pandas" in PAGE_SCOPED
+    assert "pandas" in leaked_modules(rows)
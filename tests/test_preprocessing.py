@@ -0,0 +1,53 @@
+import os
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from preprocessing import (MAX_MEAN_DIFFERENCE, MAX_P99_DIFFERENCE, decode_flag, preprocess, preprocess_batch,
+                           reference_difference, reference_preprocess)
+
+MEDIA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Media")
+
+
+def read(name):
+    with open(os.path.join(MEDIA, name), "rb") as f:
+        return f.read()
+
+
+# The sample leaf photo re-encoded at `scale`, so it's large enough for a reduced decode
+def upscaled_leaf(scale):
+    leaf = cv.imdecode(np.frombuffer(read("DanLeaf2.jpg"), dtype=np.uint8), cv.IMREAD_COLOR)
+    big = cv.resize(leaf, None, fx=scale, fy=scale, interpolation=cv.INTER_CUBIC)
+    return cv.imencode(".jpg", big, [cv.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+
+
+@pytest.mark.parametrize("name", ["DanLeaf2.jpg", "Screenshot.png"])
+def test_full_resolution_decode_matches_reference_exactly(name):
+    data = read(name)
+    assert decode_flag(data) == cv.IMREAD_COLOR
+    assert np.array_equal(preprocess(data), reference_preprocess(data))
+
+
+@pytest.mark.parametrize("scale, flag", [(2, cv.IMREAD_REDUCED_COLOR_2), (3, cv.IMREAD_REDUCED_COLOR_4),
+                                         (5, cv.IMREAD_REDUCED_COLOR_8)])
+def test_reduced_decode_stays_close_to_reference(scale, flag):
+    data = upscaled_leaf(scale)
+    assert decode_flag(data) == flag
+    mean, p99 = reference_difference(data)
+    assert mean <= MAX_MEAN_DIFFERENCE
+    assert p99 <= MAX_P99_DIFFERENCE
+
+
+def test_batch_matches_single_image_path():
+    items = [read("DanLeaf2.jpg"), upscaled_leaf(3), read("Screenshot.png")]
+    batch, failed = preprocess_batch(items)
+    assert failed == []
+    for data, row in zip(items, batch):
+        assert np.array_equal(row, preprocess(data))
+
+
+def test_undecodable_bytes_are_reported():
+    batch, failed = preprocess_batch([read("DanLeaf2.jpg"), b"not an image"])
+    assert failed == [1]
+    assert preprocess(b"not an image") is None
@@ -0,0 +1,153 @@
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from run import StandInHandler
+
+import geo_cache
+import translation
+import upstream
+
+
+class CountingHandler(StandInHandler):
+    """Stand-in that counts connections and requests per path, tracks peak concurrency and can be slowed down or broken."""
+
+    # Keep-alive, so a pooled session reuses its connection
+    protocol_version = "HTTP/1.1"
+    delay = 0
+    status = 200
+    lock = threading.Lock()
+    connections = 0
+    hits = {}
+    active = 0
+    peak = 0
+
+    def setup(self):
+        super().setup()
+        with CountingHandler.lock:
+            CountingHandler.connections += 1
+
+    def do_GET(self):
+        cls = CountingHandler
+        path = self.path.split("?")[0]
+        with cls.lock:
+            cls.hits[path] = cls.hits.get(path, 0) + 1
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(cls.delay)
+            if cls.status != 200:
+                self.send_response(cls.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            super().do_GET()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+# Points geo_cache at the stand-in and starts every test with fresh counters and upstreams
+@pytest.fixture
+def stand_in(server, monkeypatch):
+    monkeypatch.setattr(geo_cache, "NOMINATIM_DOMAIN", server)
+    monkeypatch.setattr(geo_cache, "NOMINATIM_SCHEME", "http")
+    monkeypatch.setattr(geo_cache, "OVERPASS_URL", f"http://{server}/api/interpreter")
+    monkeypatch.setattr(CountingHandler, "delay", 0.2)
+    monkeypatch.setattr(CountingHandler, "status", 200)
+    CountingHandler.connections, CountingHandler.hits, CountingHandler.peak = 0, {}, 0
+    upstream._upstreams.clear()
+    yield CountingHandler
+    upstream._upstreams.clear()
+
+
+def concurrently(fn, args_list):
+    results = [None] * len(args_list)
+
+    def run(i, args):
+        try:
+            results[i] = fn(*args)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, args)) for i, args in enumerate(args_list)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_geocodes_share_one_request(stand_in, tmp_path):
+    cache = geo_cache.GeoCache(str(tmp_path / "geo.db"))
+    results = concurrently(cache.geocode, [("Hyderabad",)] * 20)
+    assert stand_in.hits == {"/search": 1}
+    assert all(result == results[0] for result in results)
+
+
+def test_concurrent_overpass_lookups_share_one_request(stand_in, tmp_path):
+    cache = geo_cache.GeoCache(str(tmp_path / "geo.db"))
+    results = concurrently(cache.shops_near, [(17.385, 78.4867)] * 20)
+    assert stand_in.hits == {"/api/interpreter": 1}
+    assert all(len(result) == 40 for result in results)
+
+
+def test_concurrency_per_upstream_is_bounded(stand_in, tmp_path):
+    cache = geo_cache.GeoCache(str(tmp_path / "geo.db"))
+    concurrently(cache.shops_near, [(17.0 + i / 10, 78.0) for i in range(3 * upstream.MAX_CONCURRENCY)])
+    assert stand_in.hits["/api/interpreter"] == 3 * upstream.MAX_CONCURRENCY
+    assert stand_in.peak <= upstream.MAX_CONCURRENCY
+
+
+def test_sequential_requests_reuse_the_pooled_connection(stand_in, tmp_path):
+    stand_in.delay = 0
+    cache = geo_cache.GeoCache(str(tmp_path / "geo.db"))
+    for place in ["Hyderabad", "Guntur", "Warangal", "Nellore", "Kurnool"]:
+        cache.geocode(place)
+    assert stand_in.hits == {"/search": 5}
+    assert stand_in.connections == 1
+
+
+def test_failing_upstream_opens_the_circuit_and_serves_the_stale_tile(stand_in, tmp_path):
+    stand_in.delay = 0
+    cache = geo_cache.GeoCache(str(tmp_path / "geo.db"), ttl=0)
+    cache.shops_near(17.385, 78.4867)  # Cached, but immediately expired
+    stand_in.status = 503
+    for _ in range(upstream.BREAKER_FAILURES):
+        with pytest.raises(geo_cache.OverpassError):
+            cache.shops_near(12.97, 77.59)
+    assert upstream.get_upstream("overpass").breaker.state == "open"
+
+    hits_before = stand_in.hits["/api/interpreter"]
+    stale = cache.shops_near(17.385, 78.4867)
+    assert stand_in.hits["/api/interpreter"] == hits_before  # Short-circuited, nothing sent upstream
+    assert len(stale) == 40
+    assert cache.stats()["overpass_stale"] == 1
+
+
+def test_concurrent_sessions_share_one_translator_call(stand_in, tmp_path):
+    calls = []
+
+    def slow_translate(texts, target):
+        calls.append(len(texts))
+        time.sleep(0.2)
+        return [text.upper() for text in texts]
+
+    cache = translation.TranslationCache(str(tmp_path / "translations.db"), slow_translate)
+    results = concurrently(cache.translate_many, [(translation.UI_STRINGS, "te")] * 20)
+    assert calls == [len(translation.UI_STRINGS)]
+    assert all(result == [text.upper() for text in translation.UI_STRINGS] for result in results)
@@ -0,0 +1,231 @@
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+from upstream import get_upstream
+
+# Persistent cache of translated strings (shared by every session and kept across restarts)
+CACHE_PATH = os.environ.get("LEAF_TRANSLATION_CACHE_DB", "translations.db")
+# Translations kept in memory, and rows kept on disk (oldest dropped first)
+MAX_ENTRIES = int(os.environ.get("LEAF_TRANSLATION_CACHE_SIZE", "4096"))
+MAX_ROWS = int(os.environ.get("LEAF_TRANSLATION_CACHE_ROWS", "10000"))
+
+# Google Translate rejects payloads above 5000 characters, so batches are chunked below that
+MAX_BATCH_CHARS = 4500
+_SEPARATOR = "\n"
+
+# Static UI strings the app translates on every render
+UI_STRINGS = [
+    "Navigation",
+    "Select an option",
+    "Disease Prediction",
+    "Nearest Fertilizers",
+    "Chat",
+    "Dose Calculator",
+    "Please input only leaf Images of Apple, Cherry, Corn, Grape, Peach, Pepper, Potato, Strawberry, and Tomato. Otherwise, the model will not work perfectly.",
+    "Upload an image",
+    "Result is:",
+    "Try Another Image",
+    "🌱 Nearest Fertilizer Shops Finder",
+    "Find Fertilizer Shops Nearby",
+    "### 🏪 Nearby Fertilizer Shops:",
+    "⚠️ Please enter a valid location.",
+    "Welcome",
+    "Location Found:",
+    "Latitude:",
+    "Longitude:",
+]
+
+
+# Default backend: one GoogleTranslator call per chunk of newline-joined strings. deep_translator makes
+# its own requests.get calls, so these get the "translate" upstream's single-flight, concurrency limit
+# and circuit breaker (see _translate_upstream) but not its pooled keep-alive session.
+def google_translate_batch(texts, target):
+    from deep_translator import GoogleTranslator
+
+    translator = GoogleTranslator(source="auto", target=target)
+    results = []
+    for chunk in _chunks(texts):
+        translated = translator.translate(_SEPARATOR.join(chunk))
+        parts = translated.split(_SEPARATOR) if translated else []
+        if len(parts) != len(chunk):
+            # The service merged or split lines, fall back to one call per string
+            parts = [translator.translate(text) for text in chunk]
+        results.extend(parts)
+    return results
+
+
+# Offline stand-in that returns the text unchanged (useful for tests and demos without network)
+def identity_translate_batch(texts, target):
+    return list(texts)
+
+
+def _chunks(texts):
+    chunk, size = [], 0
+    for text in texts:
+        if chunk and size + len(text) + 1 > MAX_BATCH_CHARS:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(text)
+        size += len(text) + 1
+    if chunk:
+        yield chunk
+
+
+class TranslationCache:
+    """Maps (text, target language) to a translation: an in-memory LRU, with static strings also kept in SQLite."""
+
+    def __init__(self, path=CACHE_PATH, translate_batch=google_translate_batch, max_entries=MAX_ENTRIES,
+                 max_rows=MAX_ROWS, persistent=None):
+        self.path = path
+        self.translate_batch = translate_batch
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        # Only these strings are written to disk; anything else (user input, shop names) stays in the LRU
+        self.persistent = frozenset(static_catalogue() if persistent is None else persistent)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                text TEXT NOT NULL,
+                target TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                PRIMARY KEY (text, target)
+            )
+        """)
+        # Drop rows cached by older versions for dynamic strings
+        stale = [(text,) for (text,) in conn.execute("SELECT DISTINCT text FROM translations")
+                 if text not in self.persistent]
+        conn.executemany("DELETE FROM translations WHERE text = ?", stale)
+        self._trim(conn)
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    # Function to keep only the max_rows most recently written translations on disk
+    def _trim(self, conn):
+        conn.execute("DELETE FROM translations WHERE rowid NOT IN "
+                     "(SELECT rowid FROM translations ORDER BY rowid DESC LIMIT ?)", (self.max_rows,))
+
+    # Function to plug in a different translator, e.g. identity_translate_batch for offline testing
+    def set_translator(self, translate_batch):
+        self.translate_batch = translate_batch
+
+    def translate(self, text, target, cache=True):
+        return self.translate_many([text], target, cache)[0]
+
+    def _remember(self, pairs, target):
+        with self._lock:
+            for text, translation in pairs:
+                self._memory[(text, target)] = translation
+                self._memory.move_to_end((text, target))
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # Function to send strings to the translator; sessions asking for the same strings at once share
+    # one upstream call, and while the translator is failing the circuit is open and [] is returned
+    def _translate_upstream(self, texts, target):
+        try:
+            return get_upstream("translate").call(
+                ("translate", target, tuple(texts)), lambda: self.translate_batch(texts, target))
+        except Exception:
+            return []
+
+    # Function to translate many strings at once, only sending cache misses upstream.
+    # cache=False is for one-off values (addresses, names) that shouldn't take up cache space.
+    def translate_many(self, texts, target, cache=True):
+        if target == "en":
+            return list(texts)  # No translation needed for English
+
+        unique = list(dict.fromkeys(t for t in texts if t))
+        if not cache:
+            found = dict(zip(unique, self._translate_upstream(unique, target))) if unique else {}
+            return [found.get(t) or t for t in texts]
+
+        found = {}
+        with self._lock:
+            for text in unique:
+                translation = self._memory.get((text, target))
+                if translation is not None:
+                    self._memory.move_to_end((text, target))
+                    found[text] = translation
+            self.hits += len(found)
+        missing = [t for t in unique if t not in found]
+
+        on_disk = [t for t in missing if t in self.persistent]
+        if on_disk:
+            conn = self._connect()
+            rows = conn.execute(f"SELECT text, translation FROM translations WHERE target = ? AND text IN "
+                                f"({','.join('?' * len(on_disk))})", [target, *on_disk]).fetchall()
+            conn.close()
+            self._remember(rows, target)
+            found.update(rows)
+            missing = [t for t in missing if t not in found]
+            with self._lock:
+                self.disk_hits += len(rows)
+
+        if missing:
+            with self._lock:
+                self.misses += len(missing)
+            rows = [(text, result) for text, result in zip(missing, self._translate_upstream(missing, target))
+                    if result]
+            self._remember(rows, target)
+            found.update(rows)
+            persist = [(text, target, result) for text, result in rows if text in self.persistent]
+            if persist:
+                conn = self._connect()
+                conn.executemany("INSERT OR REPLACE INTO translations (text, target, translation) VALUES (?, ?, ?)",
+                                 persist)
+                self._trim(conn)
+                conn.commit()
+                conn.close()
+
+        return [found.get(t, t) for t in texts]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._memory), "max_entries": self.max_entries, "hits": self.hits,
+                    "disk_hits": self.disk_hits, "misses": self.misses}
+
+
+# Function to list every static string in the app (UI labels, disease names and treatments)
+def static_catalogue():
+    from treatment_catalogue import CATALOGUE
+
+    texts = list(UI_STRINGS)
+    for entry in CATALOGUE:
+        texts += [entry.label, entry.treatment]
+    return list(dict.fromkeys(texts))
+
+
+_translation_cache = None
+_translation_cache_lock = threading.Lock()
+
+
+# Function to get the process-wide cache, opening translations.db on first use rather than at import
+def get_translation_cache():
+    global _translation_cache
+    if _translation_cache is None:
+        with _translation_cache_lock:
+            if _translation_cache is None:
+                _translation_cache = TranslationCache(
+                    translate_batch=identity_translate_batch if os.environ.get("LEAF_OFFLINE_TRANSLATOR")
+                    else google_translate_batch)
+    return _translation_cache
+
+
+# Build-time pre-translation: python translation.py te hi
+if __name__ == "__main__":
+    targets = sys.argv[1:] or ["te", "hi"]
+    catalogue = static_catalogue()
+    for target in targets:
+        get_translation_cache().translate_many(catalogue, target)
+        print(f"✅ {len(catalogue)} strings translated to '{target}' in {CACHE_PATH}")
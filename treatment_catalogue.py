@@ -0,0 +1,104 @@
+"""Class-indexed treatment catalogue, compiled once from disease_data.
+
+    python treatment_catalogue.py            # consistency check, exits non-zero on a missing class
+    python treatment_catalogue.py te hi      # also pre-translate every entry
+
+CATALOGUE[class_id] holds everything the app shows for a model output (crop, disease, treatment
+text and the fertilizer_data crop key), so a prediction is looked up by its argmax index instead
+of by munging the label string. Translated variants are built once per language and kept.
+"""
+import sys
+import threading
+from collections import namedtuple
+
+from disease_data import label_name, disease_treatments, fertilizer_data
+
+# Label prefix -> (crop name, fertilizer_data key); strawberries have no dose data
+CROPS = {
+    "Apple": ("Apple", "apple"),
+    "Cherry": ("Cherry", "cherries"),
+    "Corn": ("Corn", "corn"),
+    "Grape": ("Grape", "grapes"),
+    "Peach": ("Peach", "peaches"),
+    "Pepper bell": ("Pepper", "pepper"),
+    "Potato": ("Potato", "potato"),
+    "Strawberry": ("Strawberry", None),
+    "Tomato": ("Tomato", "tomato"),
+}
+
+CatalogueEntry = namedtuple("CatalogueEntry",
+                            ["class_id", "label", "crop", "disease", "healthy", "treatment", "fertilizer_crop"])
+
+
+class CatalogueError(ValueError):
+    pass
+
+
+# Function to compile the catalogue, raising CatalogueError listing every class that can't be resolved
+def build_catalogue(labels=label_name, treatments=disease_treatments, fertilizers=fertilizer_data):
+    entries, problems = [], []
+    for class_id, label in enumerate(labels):
+        prefix = next((p for p in sorted(CROPS, key=len, reverse=True) if label.startswith(p + " ")), None)
+        if prefix is None:
+            problems.append(f"{class_id} {label!r}: unknown crop")
+            continue
+        crop, fertilizer_crop = CROPS[prefix]
+        if fertilizer_crop is not None and fertilizer_crop not in fertilizers:
+            problems.append(f"{class_id} {label!r}: no fertilizer_data entry {fertilizer_crop!r}")
+        treatment = treatments.get(label)
+        if not treatment:
+            problems.append(f"{class_id} {label!r}: no treatment")
+            continue
+        disease = label[len(prefix) + 1:]
+        entries.append(CatalogueEntry(class_id, label, crop, disease, disease == "healthy", treatment,
+                                      fertilizer_crop))
+
+    unused = set(treatments) - set(labels)
+    if unused:
+        problems.append(f"treatments without a class: {', '.join(sorted(unused))}")
+    if problems:
+        raise CatalogueError("Treatment catalogue is inconsistent:\n  " + "\n  ".join(problems))
+    return tuple(entries)
+
+
+CATALOGUE = build_catalogue()
+
+_localized = {}
+_localized_lock = threading.Lock()
+
+
+def lookup(class_id):
+    return CATALOGUE[class_id]
+
+
+# Function to get (label, treatment) for a class in a language; each language is translated in one batch
+def localized(class_id, target):
+    if target == "en":
+        entry = CATALOGUE[class_id]
+        return entry.label, entry.treatment
+
+    variants = _localized.get(target)
+    if variants is None:
+        with _localized_lock:
+            variants = _localized.get(target)
+            if variants is None:
+                from translation import get_translation_cache
+
+                texts = [entry.label for entry in CATALOGUE] + [entry.treatment for entry in CATALOGUE]
+                translated = get_translation_cache().translate_many(texts, target)
+                variants = tuple(zip(translated[:len(CATALOGUE)], translated[len(CATALOGUE):]))
+                if translated != texts:  # Don't keep the English fallback while the translator is down
+                    _localized[target] = variants
+    return variants[class_id]
+
+
+if __name__ == "__main__":
+    print(f"{'id':>3}  {'crop':<11}{'disease':<38}{'fertilizer':<11}treatment")
+    for entry in CATALOGUE:
+        print(f"{entry.class_id:>3}  {entry.crop:<11}{entry.disease:<38}{entry.fertilizer_crop or '-':<11}"
+              f"{entry.treatment[:50]}...")
+    print(f"✅ {len(CATALOGUE)} classes, every one has a treatment entry")
+    for target in sys.argv[1:]:
+        for class_id in range(len(CATALOGUE)):
+            localized(class_id, target)
+        print(f"✅ Catalogue translated to '{target}'")
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+# Calls allowed in flight to one upstream at a time (per process)
+MAX_CONCURRENCY = int(os.environ.get("LEAF_UPSTREAM_CONCURRENCY", "8"))
+# Consecutive failures (errors, timeouts or slow calls) that open the circuit, and how long it stays open
+BREAKER_FAILURES = int(os.environ.get("LEAF_BREAKER_FAILURES", "3"))
+BREAKER_RESET_SECONDS = float(os.environ.get("LEAF_BREAKER_RESET_SECONDS", "30"))
+USER_AGENT = "fertilizer-finder"
+# Per-service settings; a successful call slower than slow_seconds still counts as a breaker failure
+UPSTREAM_OPTIONS = {
+    "nominatim": {"slow_seconds": 5},
+    "overpass": {"slow_seconds": 20},
+    "translate": {"slow_seconds": 10},
+}
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} is unavailable, retrying in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, then lets one trial call through after `reset_seconds`."""
+
+    def __init__(self, name, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    # Function to raise CircuitOpenError unless a call may go upstream now
+    def check(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            waited = time.monotonic() - self.opened_at
+            if waited < self.reset_seconds or self._trial_running:
+                raise CircuitOpenError(self.name, max(self.reset_seconds - waited, 0))
+            self._trial_running = True  # Half-open: this caller is the trial
+
+    def record(self, ok):
+        with self._lock:
+            self._trial_running = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.max_failures or self.opened_at is not None:
+                    self.opened_at = time.monotonic()
+
+
+class Upstream:
+    """One external service: a keep-alive session, a concurrency limit, single-flight and a circuit breaker."""
+
+    def __init__(self, name, max_concurrency=MAX_CONCURRENCY, slow_seconds=None,
+                 failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.slow_seconds = slow_seconds
+        self.breaker = CircuitBreaker(name, failures, reset_seconds)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._session = None
+        self.counters = {"calls": 0, "coalesced": 0, "upstream_calls": 0, "failures": 0, "short_circuited": 0}
+
+    # Function to get the shared keep-alive session, created on first use
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    session.headers["User-Agent"] = USER_AGENT
+                    self._session = session
+        return self._session
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    # Function to run fn() upstream; callers asking for the same key while it runs share its result
+    def call(self, key, fn):
+        with self._lock:
+            self.counters["calls"] += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.counters["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(self._call_upstream(fn))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def _call_upstream(self, fn):
+        try:
+            self.breaker.check()
+        except CircuitOpenError:
+            self._count("short_circuited")
+            raise
+        with self._slots:
+            self._count("upstream_calls")
+            start = time.monotonic()
+            try:
+                result = fn()
+            except Exception:
+                self._count("failures")
+                self.breaker.record(ok=False)
+                raise
+        slow = self.slow_seconds is not None and time.monotonic() - start > self.slow_seconds
+        if slow:
+            self._count("failures")
+        self.breaker.record(ok=not slow)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, state=self.breaker.state, in_flight=len(self._in_flight),
+                        max_concurrency=self.max_concurrency)
+
+
+# Function to get the shared Upstream for a service name (nominatim, overpass, translate)
+def get_upstream(name):
+    upstream = _upstreams.get(name)
+    if upstream is not None:
+        return upstream
+    with _upstreams_lock:
+        upstream = _upstreams.get(name)
+        if upstream is None:
+            upstream = Upstream(name, **UPSTREAM_OPTIONS.get(name, {}))
+            _upstreams[name] = upstream
+    return upstream
+
+
+def upstream_stats():
+    return {name: upstream.stats() for name, upstream in list(_upstreams.items())}
+
+
+# After fork() the child must not reuse the parent's sockets, or wait on calls only the parent is making
+def _reset_after_fork():
+    global _upstreams_lock
+    _upstreams_lock = threading.Lock()
+    for upstream in list(_upstreams.values()):
+        upstream._lock = threading.Lock()
+        upstream._slots = threading.BoundedSemaphore(upstream.max_concurrency)
+        upstream.breaker._lock = threading.Lock()
+        upstream._session = None
+        upstream._in_flight = {}
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)